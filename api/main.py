@@ -1,31 +1,287 @@
 
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+import hmac
 import logging
+import os
+import threading
+import time
 from contextlib import asynccontextmanager
-from typing import Optional
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
-from recommender.engine import SHLRecommender
+from recommender.cache import ResponseCache
+from recommender.inference import InferenceExecutor, QueueFullError
+from recommender.metrics import LATENCY_BUCKETS, REGISTRY, STAGE_SECONDS, Gauge, Histogram, StageTimings
+from recommender.profiling import profile_call, sampled
+
+# torch / transformers / faiss are imported by the background loader, not at
+# module import, so uvicorn can bind the port immediately.
+if TYPE_CHECKING:
+    from recommender.batching import RecommendationBatcher
+    from recommender.engine import SHLRecommender
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
-# Global recommender instance (loaded at startup)
-_recommender: Optional[SHLRecommender] = None
+# Request coalescing: concurrent /recommend calls arriving within the window are
+# encoded and searched together. A max batch size of 1 disables coalescing.
+BATCH_WINDOW_MS = float(os.getenv("SHL_BATCH_WINDOW_MS", "5"))
+BATCH_MAX_SIZE = int(os.getenv("SHL_BATCH_MAX_SIZE", "32"))
+
+# Query-embedding cache: repeated queries (case/whitespace-insensitive) skip the
+# encoder. Set SHL_EMBED_CACHE=0 to disable.
+EMBED_CACHE_ENABLED = os.getenv("SHL_EMBED_CACHE", "1") != "0"
+EMBED_CACHE_SIZE = int(os.getenv("SHL_EMBED_CACHE_SIZE", "1024"))
+EMBED_CACHE_TTL = float(os.getenv("SHL_EMBED_CACHE_TTL", "3600"))
+
+# Response cache: serialized /recommend bodies keyed on (canonical query, top_n,
+# index version). Swapping in a new index invalidates every entry.
+RESPONSE_CACHE_ENABLED = os.getenv("SHL_RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_SIZE = int(os.getenv("SHL_RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("SHL_RESPONSE_CACHE_TTL", "3600"))
+
+# Fuse BM25 with dense retrieval. Off until `evaluate.py --compare_hybrid`
+# shows it raising Recall@10 over dense-only on the train set.
+HYBRID_RETRIEVAL = os.getenv("SHL_HYBRID", "0") != "0"
+
+# Hot reload: POST /admin/reload with X-Admin-Token (disabled unless the token is
+# set), and/or poll the index bundle every N seconds (0 disables the watcher).
+ADMIN_TOKEN = os.getenv("SHL_ADMIN_TOKEN", "")
+INDEX_WATCH_INTERVAL = float(os.getenv("SHL_INDEX_WATCH_INTERVAL", "0"))
+
+# Inference runs on its own thread pool, not Starlette's shared one. At most
+# SHL_INFERENCE_QUEUE requests wait for a thread; beyond that /recommend fails
+# fast with 503 + Retry-After. With coalescing on, a /recommend thread sits
+# blocked on the batcher while its single thread encodes the batch, so the
+# default is one thread per request a batch can hold (fewer would cap the
+# batch size). Encodes that bypass the batcher (/recommend/batch, profiled
+# requests) run on these threads too, so they are limited to
+# SHL_DIRECT_INFERENCE_SLOTS (default: one per core) at a time. Without
+# coalescing every thread encodes: one per core.
+INFERENCE_WORKERS = int(os.getenv(
+    "SHL_INFERENCE_WORKERS", str(BATCH_MAX_SIZE if BATCH_MAX_SIZE > 1 else os.cpu_count() or 1)
+))
+DIRECT_INFERENCE_SLOTS = int(os.getenv("SHL_DIRECT_INFERENCE_SLOTS", str(os.cpu_count() or 1)))
+INFERENCE_QUEUE = int(os.getenv("SHL_INFERENCE_QUEUE", "64"))
+QUEUE_FULL_RETRY_AFTER = int(os.getenv("SHL_QUEUE_FULL_RETRY_AFTER", "1"))  # seconds
+
+# Per-stage timings on /recommend and /recommend/batch responses, as a
+# Server-Timing header (visible in browser dev tools). Off by default.
+SERVER_TIMING = os.getenv("SHL_SERVER_TIMING", "0") != "0"
+
+WARMUP_QUERY = "Java developer who collaborates with business teams, 40 minutes"
+LOADING_RETRY_AFTER = 5  # seconds, sent with 503 while the model is loading
+
+
+@dataclass
+class _LoadState:
+    stage: str = "pending"  # pending → importing → loading → warming_up → ready | failed
+    started_at: float = field(default_factory=time.monotonic)
+    timings: dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class _ReloadState:
+    reloads: int = 0
+    last_trigger: Optional[str] = None
+    last_reload_at: Optional[float] = None
+    last_load_s: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+# Global recommender instance (loaded in the background at startup)
+_recommender: Optional["SHLRecommender"] = None
+_batcher: Optional["RecommendationBatcher"] = None
+_load_state = _LoadState()
+_reload_state = _ReloadState()
+_stop_watcher = threading.Event()
+_response_cache = ResponseCache(
+    max_size=RESPONSE_CACHE_SIZE,
+    ttl_seconds=RESPONSE_CACHE_TTL,
+    enabled=RESPONSE_CACHE_ENABLED,
+)
+_executor = InferenceExecutor(max_workers=INFERENCE_WORKERS, max_queue=INFERENCE_QUEUE)
+_direct_slots = threading.BoundedSemaphore(max(1, DIRECT_INFERENCE_SLOTS))
+
+# Metrics are per process: under api.serve each scrape reports the worker that answered it
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "shl_request_seconds",
+    "Recommendation request latency by endpoint and outcome (ok, cached, rejected, error).",
+    buckets=LATENCY_BUCKETS,
+    labelnames=("endpoint", "outcome"),
+))
+REGISTRY.register(Gauge("shl_ready", "1 once the recommender is loaded.", lambda: int(_recommender is not None)))
+REGISTRY.register(Gauge(
+    "shl_index_vectors", "Vectors in the loaded index.",
+    lambda: _recommender.index.ntotal if _recommender is not None else None,
+))
+REGISTRY.register(Gauge("shl_inference_running", "Inference calls running.", lambda: _executor.depth()[0]))
+REGISTRY.register(Gauge("shl_inference_queued", "Inference calls waiting for a thread.", lambda: _executor.depth()[1]))
+REGISTRY.register(Gauge(
+    "shl_inference_rejected_total", "Requests shed because the inference queue was full.",
+    lambda: _executor.rejected, kind="counter",
+))
+REGISTRY.register(Gauge(
+    "shl_response_cache_hits_total", "Response cache hits.", lambda: _response_cache.hits, kind="counter",
+))
+REGISTRY.register(Gauge(
+    "shl_response_cache_misses_total", "Response cache misses.", lambda: _response_cache.misses, kind="counter",
+))
+
+
+def _load_recommender(start_threads: bool = True) -> None:
+    """Import the heavy stack, build the recommender and warm it up, off the event loop."""
+    global _recommender
+    state = _load_state
+    try:
+        t0 = time.perf_counter()
+        state.stage = "importing"
+        from recommender.engine import SHLRecommender
+        state.timings["import_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        state.stage = "loading"
+        recommender = SHLRecommender(
+            embedding_cache=EMBED_CACHE_ENABLED,
+            embedding_cache_size=EMBED_CACHE_SIZE,
+            embedding_cache_ttl=EMBED_CACHE_TTL,
+            hybrid=HYBRID_RETRIEVAL,
+        )
+        state.timings["load_s"] = time.perf_counter() - t0
+
+        # One full inference so the first real request doesn't pay lazy
+        # initialisation (kernel selection, allocator growth, selector build)
+        t0 = time.perf_counter()
+        state.stage = "warming_up"
+        recommender.recommend(WARMUP_QUERY)
+        recommender.embedding_cache.clear()
+        state.timings["warmup_s"] = time.perf_counter() - t0
+
+        _recommender = recommender
+        if start_threads:
+            _start_threads()
+        state.timings["total_s"] = time.monotonic() - state.started_at
+        state.stage = "ready"
+        logger.info("SHLRecommender loaded in %.1fs. API ready.", state.timings["total_s"])
+    except Exception as exc:
+        state.stage = "failed"
+        state.error = f"{type(exc).__name__}: {exc}"
+        logger.error("SHLRecommender failed to load: %s", exc, exc_info=True)
+
+
+def _start_threads(watch: bool = True) -> None:
+    """This process's request batcher and index watcher, once the recommender is loaded."""
+    global _batcher
+    if BATCH_MAX_SIZE > 1:
+        from recommender.batching import RecommendationBatcher
+        _batcher = RecommendationBatcher(
+            _recommender, window_ms=BATCH_WINDOW_MS, max_batch_size=BATCH_MAX_SIZE
+        )
+    if watch and INDEX_WATCH_INTERVAL > 0:
+        threading.Thread(target=_watch_index, name="index-watcher", daemon=True).start()
+
+
+def preload() -> None:
+    """
+    Load and warm up the recommender in this process without starting any
+    threads, so that worker processes forked afterwards inherit it (api/serve.py).
+    """
+    _load_recommender(start_threads=False)
+    if _recommender is None:
+        raise RuntimeError(f"Recommender failed to load: {_load_state.error}")
+
+
+def _reload_index(trigger: str, force: bool = False) -> bool:
+    """Load the on-disk index into the running recommender and swap it in."""
+    from recommender.engine import ReloadInProgressError
+
+    state = _reload_state
+    t0 = time.perf_counter()
+    try:
+        reloaded = _recommender.reload(warmup_query=WARMUP_QUERY, force=force)
+    except ReloadInProgressError:
+        raise
+    except Exception as exc:
+        state.last_error = f"{type(exc).__name__}: {exc}"
+        logger.error("Index reload (%s) failed; still serving %s: %s",
+                     trigger, _recommender.version, exc, exc_info=True)
+        raise
+    state.last_error = None
+    if reloaded:
+        state.reloads += 1
+        state.last_trigger = trigger
+        state.last_reload_at = time.time()
+        state.last_load_s = time.perf_counter() - t0
+    return reloaded
+
+
+def _watch_index() -> None:
+    """Poll the index fingerprint and hot-reload when a rebuilt index lands."""
+    from embeddings.index_builder import index_version
+
+    seen = index_version()
+    while not _stop_watcher.wait(INDEX_WATCH_INTERVAL):
+        current = index_version()
+        if current == seen:
+            continue
+        seen = current
+        try:
+            _reload_index("watch")
+        except Exception:
+            pass  # logged by _reload_index; retried when the files change again
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load the recommender once at startup."""
-    global _recommender
-    logger.info("Loading SHLRecommender at startup...")
-    _recommender = SHLRecommender()
-    logger.info("SHLRecommender loaded. API ready.")
+    """Start loading the recommender in the background (unless preloaded) and serve immediately."""
+    global _batcher
+    if _recommender is None:
+        logger.info("Loading SHLRecommender in the background...")
+        threading.Thread(target=_load_recommender, name="recommender-loader", daemon=True).start()
+    else:
+        # Preloaded before this worker was forked; threads don't survive a fork.
+        # The supervisor watches the index and re-forks on a change, so the
+        # new index is shared too rather than loaded once per worker.
+        _start_threads(watch=False)
     yield
     logger.info("API shutting down.")
+    _stop_watcher.set()
+    _executor.close()
+    if _batcher is not None:
+        _batcher.close()
+        _batcher = None
+
+
+def _require_recommender() -> "SHLRecommender":
+    if _recommender is None:
+        if _load_state.stage == "failed":
+            raise HTTPException(status_code=503, detail=f"Recommender failed to load: {_load_state.error}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Recommender is still loading ({_load_state.stage}).",
+            headers={"Retry-After": str(LOADING_RETRY_AFTER)},
+        )
+    return _recommender
+
+
+async def _run_inference(fn, *args):
+    """Run a blocking inference call on the inference executor, or shed it with 503."""
+    try:
+        return await _executor.run(fn, *args)
+    except QueueFullError as exc:
+        logger.warning("Rejected request: %s", exc)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy; retry shortly.",
+            headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER)},
+        )
 
 
 app = FastAPI(
@@ -62,46 +318,280 @@ class RecommendResponse(BaseModel):
     recommended_assessments: list[AssessmentResult]
 
 
+class BatchRecommendRequest(BaseModel):
+    queries: list[str] = Field(
+        ..., min_length=1, max_length=100, description="Queries or job descriptions (1–100)."
+    )
+    top_n: int = Field(10, ge=1, le=10, description="Max number of recommendations per query (1–10).")
+
+
+class BatchRecommendResponse(BaseModel):
+    results: list[RecommendResponse]
+
+
+def _to_response(results: list[dict]) -> RecommendResponse:
+    assessments = [
+        AssessmentResult(
+            url=r.get("url", ""),
+            name=r.get("name", ""),
+            adaptive_support=r.get("adaptive_support", "No"),
+            description=r.get("description", ""),
+            duration=r.get("duration"),
+            remote_support=r.get("remote_support", "No"),
+            test_type=r.get("test_types", []),
+        )
+        for r in results
+    ]
+    return RecommendResponse(recommended_assessments=assessments)
+
+
 
 
 @app.get("/health")
 def health_check():
-    """Health check endpoint."""
+    """Liveness: the process is up and serving, whether or not the model has loaded."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 200 once the recommender is loaded and warmed up, 503 before."""
+    body = {
+        "status": "ready" if _recommender is not None else _load_state.stage,
+        "stage": _load_state.stage,
+        "elapsed_s": round(time.monotonic() - _load_state.started_at, 3),
+        "timings": {k: round(v, 3) for k, v in _load_state.timings.items()},
+    }
+    if _load_state.error:
+        body["error"] = _load_state.error
+    if _recommender is not None:
+        body["index_version"] = _recommender.version
+    if _reload_state.last_error:
+        body["last_reload_error"] = _reload_state.last_error
+    return JSONResponse(body, status_code=200 if _recommender is not None else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters for the query-embedding and response caches."""
+    return {
+        "embedding": _recommender.embedding_cache.stats() if _recommender else None,
+        "response": _response_cache.stats(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Stage latency histograms and request, cache and queue counters in Prometheus text format."""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/inference/stats")
+def inference_stats():
+    """Inference queue depth, rejections and queue-wait / run-time percentiles (ms)."""
+    return _executor.stats()
+
+
+def _direct(fn, *args, **kwargs):
+    """Run an encode that bypasses the batcher, at most DIRECT_INFERENCE_SLOTS at a time."""
+    with _direct_slots:
+        return fn(*args, **kwargs)
+
+
+def _recommend_body(
+    recommender: "SHLRecommender",
+    query: str,
+    top_n: int,
+    timings: Optional[StageTimings] = None,
+    enqueued: float = 0.0,
+    batched: bool = True,
+) -> bytes:
+    if timings is not None:
+        timings.add("queue", time.perf_counter() - enqueued)
+    if _batcher is not None and batched:
+        results = _batcher.recommend(query, top_n=top_n, timings=timings)
+    else:
+        results = _direct(recommender.recommend, query, top_n=top_n, timings=timings)
+    t0 = time.perf_counter()
+    body = _to_response(results).model_dump_json().encode("utf-8")
+    _observe_stage("serialize", time.perf_counter() - t0, timings)
+    return body
+
+
+def _profiled_body(recommender: "SHLRecommender", query: str, top_n: int, trigger: str, **kwargs):
+    """
+    `_recommend_body` under the profiler. It bypasses the batcher so the work
+    runs on this (profiled) thread. Returns the body and the profile path.
+    """
+    return profile_call(
+        partial(_recommend_body, recommender, query, top_n, batched=False, **kwargs),
+        name="recommend",
+        meta={"query": query, "top_n": top_n, "trigger": trigger, "index_version": recommender.version},
+    )
+
+
+def _header_flag(value: Optional[str]) -> bool:
+    # "0", "false", "no", "off" and empty turn a switch off, like SHL_* env flags set to "0"
+    return value is not None and value.strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def _profile_trigger(x_profile: Optional[str], x_admin_token: Optional[str]) -> Optional[str]:
+    """Why this request is profiled ("header" or "sampled"), or None."""
+    if _header_flag(x_profile) and ADMIN_TOKEN:
+        if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+            raise HTTPException(status_code=401, detail="X-Profile requires a valid X-Admin-Token.")
+        return "header"
+    return "sampled" if sampled() else None
+
+
+def _observe_stage(stage: str, seconds: float, timings: Optional[StageTimings]) -> None:
+    STAGE_SECONDS.observe(seconds, stage)
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def _observe_request(endpoint: str, outcome: str, started: float) -> float:
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, endpoint, outcome)
+    return elapsed
+
+
+def _finish(
+    response: Response,
+    endpoint: str,
+    outcome: str,
+    started: float,
+    timings: Optional[StageTimings],
+) -> Response:
+    """Record the request's latency and attach its Server-Timing header, if enabled."""
+    elapsed = _observe_request(endpoint, outcome, started)
+    if timings is not None:
+        timings.add("total", elapsed)
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+
 @app.post("/recommend", response_model=RecommendResponse)
-def recommend(request: RecommendRequest):
+async def recommend(
+    request: RecommendRequest,
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
     """
     Accept a job description or natural language query.
     Return 5–10 most relevant SHL Individual Test Solutions.
-    """
-    global _recommender
 
-    if _recommender is None:
-        raise HTTPException(status_code=503, detail="Recommender not initialized.")
+    With `X-Profile: 1` and a valid `X-Admin-Token` (or when sampled by
+    SHL_PROFILE_SAMPLE_RATE) the request is profiled; the profile's file
+    name comes back in the `X-Profile` response header.
+    """
+    started = time.perf_counter()
+    recommender = _require_recommender()
 
     query = request.query.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query must not be empty.")
+    timings = StageTimings() if SERVER_TIMING else None
+    trigger = _profile_trigger(x_profile, x_admin_token)
 
+    # Version of the index actually loaded; a hot reload invalidates the cache
+    version = recommender.version
+    if trigger is None:
+        t0 = time.perf_counter()
+        cached = _response_cache.lookup(query, request.top_n, version)
+        if timings is not None:
+            timings.add("cache", time.perf_counter() - t0)
+        if cached is not None:
+            response = Response(content=cached, media_type="application/json")
+            return _finish(response, "/recommend", "cached", started, timings)
+
+    profile_path = None
     try:
-        results = _recommender.recommend(query, top_n=request.top_n)
+        if trigger is None:
+            body = await _run_inference(
+                _recommend_body, recommender, query, request.top_n, timings, time.perf_counter()
+            )
+        else:
+            body, profile_path = await _run_inference(partial(
+                _profiled_body, recommender, query, request.top_n, trigger,
+                timings=timings, enqueued=time.perf_counter(),
+            ))
+    except HTTPException as exc:
+        _observe_request("/recommend", "rejected" if exc.status_code == 503 else "error", started)
+        raise
     except Exception as exc:
+        _observe_request("/recommend", "error", started)
         logger.error("Recommendation error: %s", exc, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(exc)}")
 
-    assessments = [
-        AssessmentResult(
-            url=r.get("url", ""),
-            name=r.get("name", ""),
-            adaptive_support=r.get("adaptive_support", "No"),
-            description=r.get("description", ""),
-            duration=r.get("duration"),
-            remote_support=r.get("remote_support", "No"),
-            test_type=r.get("test_types", []),
+    # Skip caching if a reload landed mid-request (results may be from either version)
+    if recommender.version == version:
+        _response_cache.store(query, request.top_n, version, body)
+    response = Response(content=body, media_type="application/json")
+    if profile_path is not None:
+        response.headers["X-Profile"] = profile_path.name
+    return _finish(response, "/recommend", "ok", started, timings)
+
+
+@app.post("/recommend/batch", response_model=BatchRecommendResponse)
+async def recommend_batch(request: BatchRecommendRequest):
+    """
+    Accept a list of job descriptions or queries.
+    Return 5–10 recommendations per query, in request order.
+    """
+    started = time.perf_counter()
+    recommender = _require_recommender()
+
+    queries = [q.strip() for q in request.queries]
+    if not all(queries):
+        raise HTTPException(status_code=400, detail="Queries must not be empty.")
+    timings = StageTimings() if SERVER_TIMING else None
+
+    try:
+        batch_results = await _run_inference(
+            partial(_direct, recommender.recommend_batch, queries, request.top_n, timings=timings)
         )
-        for r in results
-    ]
+    except HTTPException as exc:
+        _observe_request("/recommend/batch", "rejected" if exc.status_code == 503 else "error", started)
+        raise
+    except Exception as exc:
+        _observe_request("/recommend/batch", "error", started)
+        logger.error("Batch recommendation error: %s", exc, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(exc)}")
 
-    return RecommendResponse(recommended_assessments=assessments)
+    t0 = time.perf_counter()
+    body = BatchRecommendResponse(results=[_to_response(r) for r in batch_results]).model_dump_json()
+    _observe_stage("serialize", time.perf_counter() - t0, timings)
+    response = Response(content=body.encode("utf-8"), media_type="application/json")
+    return _finish(response, "/recommend/batch", "ok", started, timings)
+
+
+@app.post("/admin/reload")
+def admin_reload(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the rebuilt index in the background of this request and swap it in
+    without dropping traffic. Requires the SHL_ADMIN_TOKEN value in X-Admin-Token.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (SHL_ADMIN_TOKEN is not set).")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token.")
+    recommender = _require_recommender()
+    from recommender.engine import ReloadInProgressError
+
+    previous = recommender.version
+    try:
+        reloaded = _reload_index("admin", force=force)
+    except ReloadInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Reload failed; still serving {previous}: {exc}")
+
+    return {
+        "reloaded": reloaded,
+        "previous_version": previous,
+        "version": recommender.version,
+        "count": recommender.index.ntotal,
+        "reloads": _reload_state.reloads,
+        "load_s": round(_reload_state.last_load_s, 3) if reloaded else None,
+    }
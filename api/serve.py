@@ -0,0 +1,226 @@
+"""
+Pre-fork launcher: load the recommender once, then fork API workers.
+
+    python -m api.serve --host 0.0.0.0 --port 8000 --workers 4
+
+`uvicorn --workers N` imports the app in every worker and each one loads its
+own model, index and metadata. Here the parent loads and warms the recommender
+once, freezes the GC so collections don't write to the inherited objects, binds
+the socket and forks N workers. The workers share the model weights and Python
+objects copy-on-write, and the memory-mapped index bundle through the page
+cache. The parent restarts workers that die. On SIGHUP, or when it sees a
+rebuilt index (SHL_INDEX_WATCH_INTERVAL), it reloads the index and replaces the
+workers, so the new index is shared as well. On SIGTERM/SIGINT it shuts the
+workers down gracefully.
+
+The socket is bound before loading, so a port conflict fails fast, but no
+request (not even /health) is answered until the workers are forked. The
+single-process `uvicorn api.main:app` answers /health while it loads, so it
+stays the deploy default; use this launcher where memory per core matters more.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Optional
+
+logger = logging.getLogger("api.serve")
+
+SERVE_WORKERS = int(os.getenv("SHL_SERVE_WORKERS", str(os.cpu_count() or 1)))
+RESTART_BACKOFF = 1.0  # seconds before replacing a worker that died right after starting
+
+
+def _single_threaded_runtime() -> None:
+    # Thread pools that exist at fork time don't exist in the child, and
+    # OpenMP/ONNX Runtime pools left behind by the parent can deadlock it.
+    # Each worker encodes on one thread; scale with --workers instead.
+    os.environ["OMP_NUM_THREADS"] = "1"
+    os.environ["SHL_ENCODER_THREADS"] = "1"
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, args: argparse.Namespace) -> None:
+    import uvicorn
+
+    from api.main import app
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        timeout_keep_alive=args.timeout_keep_alive,
+        lifespan="on",
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class _Supervisor:
+    def __init__(self, sock: socket.socket, args: argparse.Namespace):
+        self.sock = sock
+        self.args = args
+        self.workers: dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self.reload_requested: Optional[str] = None  # trigger of a pending reload
+        self.seen_version: Optional[str] = None
+        self.next_watch = 0.0
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.sock, self.args)
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+        return pid
+
+    def stop(self, pids, sig=signal.SIGTERM) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            logger.info("Worker %d exited (status %d)", pid, status)
+            if self.stopping:
+                continue
+            if time.monotonic() - started < RESTART_BACKOFF:
+                time.sleep(RESTART_BACKOFF)
+            self.spawn()
+
+    def reload(self) -> None:
+        """Reload the index in the parent, then swap in freshly forked workers."""
+        from api import main
+        from embeddings.index_builder import index_version
+
+        trigger, self.reload_requested = self.reload_requested, None
+        self.seen_version = index_version()
+        gc.unfreeze()
+        try:
+            reloaded = main._reload_index(trigger)
+        except Exception:
+            logger.error("Reload failed; keeping the current workers.")
+            gc.freeze()
+            return
+        gc.collect()
+        gc.freeze()
+        if not reloaded:
+            return
+        old = list(self.workers)
+        for _ in range(self.args.workers):
+            self.spawn()
+        for pid in old:
+            self.workers.pop(pid, None)  # replaced: don't respawn when they exit
+        self.stop(old)
+        logger.info("Replaced %d workers after reload", len(old))
+
+    def watch(self) -> None:
+        """Request a reload when the on-disk index changes (the workers don't watch it themselves)."""
+        from api import main
+        from embeddings.index_builder import index_version
+
+        interval = main.INDEX_WATCH_INTERVAL
+        if interval <= 0 or time.monotonic() < self.next_watch:
+            return
+        self.next_watch = time.monotonic() + interval
+        current = index_version()
+        if self.seen_version is None:
+            self.seen_version = current
+        elif current != self.seen_version and self.reload_requested is None:
+            self.reload_requested = "watch"
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        for _ in range(self.args.workers):
+            self.spawn()
+        while not self.stopping:
+            self.watch()
+            if self.reload_requested:
+                self.reload()
+            self.reap()
+            time.sleep(0.2)
+
+        logger.info("Shutting down %d workers", len(self.workers))
+        self.stop(list(self.workers))
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        self.stop(list(self.workers), signal.SIGKILL)
+
+    def _on_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self.reload_requested = "sighup"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one loaded recommender")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="Worker processes (default: CPU count)")
+    parser.add_argument("--log_level", default="info")
+    parser.add_argument("--timeout_keep_alive", type=int, default=5)
+    parser.add_argument("--graceful_timeout", type=float, default=30.0, help="Seconds workers get to finish on shutdown")
+    args = parser.parse_args()
+
+    _single_threaded_runtime()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    from api import main as api_main
+
+    sock = _bind(args.host, args.port)
+    t0 = time.perf_counter()
+    api_main.preload()
+    # Move everything loaded so far out of the collector's reach: collections
+    # in the workers would otherwise write to (and so copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    logger.info("Recommender preloaded in %.1fs; forking %d workers", time.perf_counter() - t0, args.workers)
+
+    _Supervisor(sock, args).run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+
+# Fields whose change requires re-encoding an assessment
+COMPARED_FIELDS = (
+    "name", "description", "duration", "remote_support", "adaptive_support", "test_types",
+)
+# The subset a listing-only crawl (no detail pages) actually reads
+LISTING_FIELDS = ("name", "test_types")
+
+
+@dataclass
+class CatalogDiff:
+    added: list[dict] = field(default_factory=list)
+    changed: list[dict] = field(default_factory=list)
+    removed: list[dict] = field(default_factory=list)
+
+    @property
+    def upserts(self) -> list[dict]:
+        return self.added + self.changed
+
+    @property
+    def removed_urls(self) -> list[str]:
+        return [a["url"] for a in self.removed]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed"
+
+
+def diff_catalog(old: list[dict], new: list[dict], listing_only: bool = False) -> CatalogDiff:
+    """
+    Assessments added, changed or removed between two crawls, matched by URL.
+
+    With `listing_only`, `new` comes from listing pages alone: only names
+    and test types are compared, listing types count as changed only if the
+    old record lacks one (detail pages add types the listing doesn't show),
+    and changed assessments keep their old detail fields.
+    """
+    old_by_url = {a["url"]: a for a in old}
+    new_by_url = {a["url"]: a for a in new}
+
+    diff = CatalogDiff()
+    for url, assessment in new_by_url.items():
+        previous = old_by_url.get(url)
+        if previous is None:
+            diff.added.append(assessment)
+        elif not listing_only:
+            if any(previous.get(f) != assessment.get(f) for f in COMPARED_FIELDS):
+                diff.changed.append(assessment)
+        else:
+            old_types = previous.get("test_types") or []
+            new_types = [t for t in assessment.get("test_types") or [] if t not in old_types]
+            if previous.get("name") != assessment.get("name") or new_types:
+                diff.changed.append({
+                    **previous,
+                    "name": assessment.get("name"),
+                    "test_types": old_types + new_types,
+                })
+    diff.removed = [a for url, a in old_by_url.items() if url not in new_by_url]
+    return diff
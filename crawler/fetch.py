@@ -0,0 +1,147 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_AFTER = 120.0  # seconds; longer server hints are capped
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    wait = (1.0 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for `seconds` (e.g. a server's Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header: delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class Fetcher:
+    """
+    Thread-safe HTTP GET with a pooled keep-alive session, a per-host
+    token-bucket rate limit and retries.
+
+    Retryable responses (429/5xx) wait for the server's Retry-After when one
+    is given, and that pause applies to the whole host so concurrent workers
+    back off together. Other failures use exponential backoff with jitter.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[dict] = None,
+        rate_per_host: float = 4.0,
+        burst: float = 4.0,
+        max_connections: int = 8,
+        timeout: float = 30.0,
+        retries: int = 3,
+        backoff: float = 1.0,
+    ):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.limiter = HostRateLimiter(rate_per_host, burst)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def get(self, url: str, headers: Optional[dict] = None) -> Optional[requests.Response]:
+        bucket = self.limiter.bucket(url)
+        for attempt in range(self.retries):
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            bucket.acquire()
+            try:
+                resp = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as exc:
+                logger.warning("Attempt %d failed for %s: %s", attempt + 1, url, exc)
+            else:
+                if resp.status_code not in RETRY_STATUSES:
+                    try:
+                        resp.raise_for_status()
+                    except requests.HTTPError as exc:
+                        # 4xx other than 429 won't get better on retry
+                        logger.warning("Giving up on %s: %s", url, exc)
+                        return None
+                    return resp
+                retry_after = _retry_after_seconds(resp.headers.get("Retry-After"))
+                logger.warning(
+                    "Attempt %d for %s returned %d (Retry-After: %s)",
+                    attempt + 1, url, resp.status_code, resp.headers.get("Retry-After"),
+                )
+                if retry_after is not None:
+                    delay = min(retry_after, MAX_RETRY_AFTER)
+                    bucket.pause(delay)
+            if attempt + 1 < self.retries:
+                time.sleep(delay)
+        logger.error("All retries exhausted for %s", url)
+        return None
+
+    def close(self) -> None:
+        self.session.close()
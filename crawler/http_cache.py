@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_DIR = Path(os.getenv(
+    "SHL_HTTP_CACHE_DIR", Path(__file__).parent.parent / "data" / "http_cache"
+))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body_path: Path
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    parsed: dict[str, Any] = field(default_factory=dict)  # kind → {"parser": v, "value": ...}
+
+    @property
+    def text(self) -> str:
+        return self.body_path.read_text(encoding="utf-8")
+
+    def validators(self) -> dict[str, str]:
+        """Conditional-request headers that let the server answer 304."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def parsed_value(self, kind: str, parser_version: int) -> Optional[Any]:
+        entry = self.parsed.get(kind)
+        if entry is None or entry.get("parser") != parser_version:
+            return None
+        return entry["value"]
+
+
+class HttpCache:
+    """
+    On-disk cache of crawled pages: body, ETag and Last-Modified per URL,
+    plus the parsed result of the page so a 304 skips parsing too.
+
+    One `<sha256>.json` + `<sha256>.html` pair per URL, each written to a
+    temp file and renamed, so concurrent crawl workers and crashes never
+    leave a torn entry.
+    """
+
+    def __init__(self, cache_dir: Path = HTTP_CACHE_DIR):
+        self.dir = cache_dir
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.counts = {"fetched": 0, "not_modified": 0, "offline": 0, "stale": 0, "missing": 0}
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.dir / f"{key}.json", self.dir / f"{key}.html"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: str) -> None:
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not body_path.exists():
+            return None
+        return CachedPage(
+            url=url,
+            body_path=body_path,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            fetched_at=meta.get("fetched_at", 0.0),
+            parsed=meta.get("parsed", {}),
+        )
+
+    def _write_meta(self, page: CachedPage) -> None:
+        meta_path, _ = self._paths(page.url)
+        self._write_atomic(meta_path, json.dumps({
+            "url": page.url,
+            "etag": page.etag,
+            "last_modified": page.last_modified,
+            "fetched_at": page.fetched_at,
+            "parsed": page.parsed,
+        }, ensure_ascii=False))
+
+    def put(self, url: str, text: str, headers: dict) -> CachedPage:
+        """Store a freshly downloaded page (any previous parse is dropped)."""
+        meta_path, body_path = self._paths(url)
+        self._write_atomic(body_path, text)
+        page = CachedPage(
+            url=url,
+            body_path=body_path,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            fetched_at=time.time(),
+        )
+        self._write_meta(page)
+        return page
+
+    def put_parsed(self, page: CachedPage, kind: str, parser_version: int, value: Any) -> None:
+        page.parsed[kind] = {"parser": parser_version, "value": value}
+        self._write_meta(page)
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
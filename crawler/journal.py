@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATH = Path(__file__).parent.parent / "data" / "crawl_journal.jsonl"
+FSYNC_EVERY = 32  # entries
+FSYNC_INTERVAL = 1.0  # seconds
+
+# Entry types
+LISTING = "listing"  # one listing page: url, items, next
+LISTING_DONE = "listing_done"  # deduplicated listing, in catalog order
+DETAIL = "detail"  # one finished assessment
+COMPLETE = "complete"
+
+
+@dataclass
+class JournalState:
+    """What a previous, interrupted crawl already finished."""
+    listing_items: list[dict] = field(default_factory=list)
+    next_listing_url: Optional[str] = None
+    listing_pages: int = 0
+    listing: Optional[list[dict]] = None  # set once the listing phase finished
+    details: dict[str, int] = field(default_factory=dict)  # url → byte offset of its entry
+    complete: bool = False
+    valid_bytes: int = 0  # length up to the last complete entry
+
+
+class CrawlJournal:
+    """
+    Append-only JSONL journal of crawl progress, so an interrupted crawl
+    resumes where it stopped instead of starting over.
+
+    Entries are flushed immediately and fsynced in batches (every
+    FSYNC_EVERY entries or FSYNC_INTERVAL seconds). A crash loses at most
+    that batch, and a torn last line is ignored on read. Finished
+    assessments are located by byte offset rather than kept in memory.
+    """
+
+    def __init__(
+        self,
+        path: Path = JOURNAL_PATH,
+        fsync_every: int = FSYNC_EVERY,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _iter_entries(self) -> Iterator[tuple[int, int, dict]]:
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write
+                yield offset, len(line), json.loads(line)
+                offset += len(line)
+
+    def load(self) -> JournalState:
+        state = JournalState()
+        if not self.path.exists():
+            return state
+        for offset, entry_len, entry in self._iter_entries():
+            kind = entry["type"]
+            if kind == LISTING:
+                state.listing_items.extend(entry["items"])
+                state.next_listing_url = entry["next"]
+                state.listing_pages += 1
+            elif kind == LISTING_DONE:
+                state.listing = entry["items"]
+            elif kind == DETAIL:
+                state.details[entry["assessment"]["url"]] = offset
+            elif kind == COMPLETE:
+                state.complete = True
+            state.valid_bytes = offset + entry_len
+        return state
+
+    def read_detail(self, offset: int) -> dict:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())["assessment"]
+
+    def open(self, resume: bool = True) -> JournalState:
+        """Open for appending; returns the state to resume from (empty if starting over)."""
+        state = self.load() if resume else JournalState()
+        if state.complete or not resume:
+            state = JournalState()
+            self.path.unlink(missing_ok=True)
+        elif state.listing_pages or state.details:
+            logger.info(
+                "Resuming crawl from journal: %d listing pages, %d assessments already done",
+                state.listing_pages, len(state.details)
+            )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        # Drop a torn trailing line so new entries start on a fresh line
+        self._file.truncate(state.valid_bytes)
+        return state
+
+    def _append(self, entry: dict, sync: bool = False) -> None:
+        data = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            self._unsynced += 1
+            if (
+                sync
+                or self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = time.monotonic()
+
+    def record_listing_page(self, url: str, items: list[dict], next_url: Optional[str]) -> None:
+        self._append({"type": LISTING, "url": url, "items": items, "next": next_url}, sync=True)
+
+    def record_listing_done(self, items: list[dict]) -> None:
+        self._append({"type": LISTING_DONE, "items": items}, sync=True)
+
+    def record_detail(self, assessment: dict) -> None:
+        self._append({"type": DETAIL, "assessment": assessment})
+
+    def record_complete(self) -> None:
+        self._append({"type": COMPLETE}, sync=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            with self._lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def discard(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def iter_assessments(self) -> Iterator[dict]:
+        """Finished assessments in catalog order, read back one at a time."""
+        state = self.load()
+        if state.listing is None:
+            raise ValueError(f"Crawl journal {self.path} has no finished listing to compact.")
+        for item in state.listing:
+            offset = state.details.get(item["url"])
+            if offset is None:
+                raise ValueError(f"Crawl journal {self.path} is missing {item['url']}; resume the crawl first.")
+            yield self.read_detail(offset)
+
+    def compact(self, output_path: Path) -> int:
+        """
+        Stream the finished crawl into `output_path` as a JSON array (same
+        format as `save()`), then delete the journal. Returns the count.
+        """
+        tmp = output_path.with_suffix(output_path.suffix + ".tmp")
+        count = 0
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("[")
+            for assessment in self.iter_assessments():
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(assessment, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                count += 1
+            f.write("\n]" if count else "]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, output_path)
+        self.discard()
+        logger.info("Compacted crawl journal into %s (%d assessments)", output_path, count)
+        return count
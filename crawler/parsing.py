@@ -0,0 +1,301 @@
+import re
+from typing import Optional
+
+from lxml import etree
+
+from crawler.test_types import TEST_TYPE_MAP
+
+# Pages are parsed with libxml2 and every field is pulled out with
+# precompiled XPath/regex, instead of building a BeautifulSoup tree and
+# running CSS selectors over it. Listing selectors mirror the ones the
+# crawler has always used. Detail pages are cut down to their <main>
+# element before parsing (see _detail_root).
+
+_HTML_PARSER = etree.HTMLParser()
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Text the way BeautifulSoup's get_text() sees it: no script/style/template
+# contents, no comments
+_TEXT = etree.XPath(
+    ".//text()[not(parent::script or parent::style or ancestor::template)]",
+    smart_strings=False,
+)
+
+# Detail pages: description candidates in document order, ranked in
+# _description() by the selector they satisfy, then any paragraph as the fallback
+_DESCRIPTION_CANDIDATES = etree.XPath(".//*[contains(@class, 'description')] | .//p")
+_DESCRIPTION_MIN_CHARS = 30  # a selector's match shorter than this is skipped
+_PARAGRAPH_MIN_CHARS = 60  # for the first-paragraph fallback
+_MAIN_START_RE = re.compile(r"<main\b", re.IGNORECASE)
+_MAIN_END_RE = re.compile(r"</main\s*>", re.IGNORECASE)
+# Everything the detail text is searched for, matched in one pass: the first
+# "<n> minutes", "remote testing" followed by "yes" on the same line,
+# "adaptive" and "yes" on the same line in either order, and stand-alone
+# test-type letters
+_DETAIL_TOKENS = re.compile(
+    r"(?P<minutes>\d+)\s*(?:minutes?|mins?)"
+    r"|(?P<remote>remote\s+testing)"
+    r"|(?P<adaptive>adaptive)"
+    r"|(?P<yes>yes)"
+    r"|(?P<newline>\n)"
+    r"|(?-i:\b(?P<badge>[ABCDEKPS])\b)",
+    re.IGNORECASE,
+)
+
+_PRODUCT_LINK = "a[contains(@href, '/product-catalog/view/')]"
+_PRODUCT_LINKS = etree.XPath(f"//{_PRODUCT_LINK}")
+_ROW_PRODUCT_LINK = etree.XPath(f".//{_PRODUCT_LINK}")
+_CATALOG_ROWS = etree.XPath(
+    f"//tr[{_has_class('js-product-row')}]"
+    f" | //*[{_has_class('product-catalogue__row')}]"
+    " | //*[contains(@data-href, 'product-catalog')]"
+)
+_NEXT_LINK = etree.XPath(
+    f"//a[@rel='next'] | //*[{_has_class('pagination__next')}]//a | //a[{_has_class('next')}]"
+)
+_ANCHORS = etree.XPath("//a")
+_LINKS = etree.XPath("//a[@href]")
+_SPANS = etree.XPath(".//span")
+_BADGE_CLASS_RE = re.compile(r"product-catalogue.*type", re.I)
+_NEXT_TEXT_RE = re.compile(r"next", re.I)
+
+
+def _parse(html: str) -> Optional[etree._Element]:
+    if not html or not html.strip():
+        return None
+    try:
+        return etree.fromstring(html, _HTML_PARSER)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+
+
+def _stripped(el: etree._Element) -> list[str]:
+    return [s for s in (t.strip() for t in _TEXT(el)) if s]
+
+
+def _text(el: etree._Element) -> str:
+    """Equivalent of BeautifulSoup's `get_text(strip=True)`."""
+    return "".join(_stripped(el))
+
+
+def _absolute(href: str, base_url: str) -> str:
+    return href if href.startswith("http") else base_url + href
+
+
+def _single_string(el: etree._Element) -> Optional[str]:
+    """Equivalent of BeautifulSoup's `.string`: the one string under `el`, if any."""
+    while True:
+        if len(el) == 0:
+            return el.text
+        if el.text or len(el) > 1 or el[0].tail:
+            return None
+        el = el[0]
+        if not isinstance(el.tag, str):
+            return el.text  # a lone comment
+
+
+def empty_detail() -> dict:
+    return {
+        "description": "",
+        "duration": None,
+        "remote_support": "No",
+        "adaptive_support": "No",
+        "test_types": [],
+    }
+
+
+def _detail_root(html: str) -> Optional[etree._Element]:
+    """
+    The part of a detail page the fields are read from: its <main> element,
+    cut out of the HTML before parsing so the header, navigation, footer and
+    their scripts are never tokenized or searched. Pages without one are
+    parsed whole.
+    """
+    start = _MAIN_START_RE.search(html) if html else None
+    if start is not None:
+        end = _MAIN_END_RE.search(html, start.end())
+        if end is not None:
+            html = html[start.start():end.end()]
+    return _parse(html)
+
+
+def _description(root: etree._Element) -> str:
+    # First match of each of the selectors the crawler has always tried, in
+    # order: .product-hero__description, .product-description,
+    # [class*=description], "article p", ".hero p"
+    first: dict[int, etree._Element] = {}
+    paragraphs = []
+    for el in _DESCRIPTION_CANDIDATES(root):
+        cls = el.get("class", "")
+        if "description" in cls:
+            classes = cls.split()
+            if "product-hero__description" in classes:
+                first.setdefault(0, el)
+            if "product-description" in classes:
+                first.setdefault(1, el)
+            first.setdefault(2, el)
+        if el.tag == "p":
+            paragraphs.append(el)
+            if 3 not in first or 4 not in first:
+                for parent in el.iterancestors():
+                    if parent.tag == "article":
+                        first.setdefault(3, el)
+                    if "hero" in parent.get("class", "").split():
+                        first.setdefault(4, el)
+
+    for rank in sorted(first):
+        strings = _stripped(first[rank])
+        if len("".join(strings)) > _DESCRIPTION_MIN_CHARS:
+            return " ".join(strings)
+    # Fallback: first substantial <p>
+    for p in paragraphs:
+        text = _text(p)
+        if len(text) > _PARAGRAPH_MIN_CHARS:
+            return text
+    return ""
+
+
+def parse_assessment_detail(html: str) -> dict:
+
+    detail = empty_detail()
+    root = _detail_root(html)
+    if root is None:
+        return detail
+
+    detail["description"] = _description(root)
+
+    # SHL pages typically list these as key-value pairs
+    remote = adaptive = yes = False  # seen on the current line
+    letters = []
+    for match in _DETAIL_TOKENS.finditer(" ".join(_TEXT(root))):
+        token = match.lastgroup
+        if token == "newline":
+            remote = adaptive = yes = False
+        elif token == "minutes":
+            if detail["duration"] is None:
+                detail["duration"] = int(match.group("minutes"))
+        elif token == "remote":
+            remote = True
+        elif token == "adaptive":
+            adaptive = True
+            if yes:
+                detail["adaptive_support"] = "Yes"
+        elif token == "yes":
+            yes = True
+            if remote:
+                detail["remote_support"] = "Yes"
+            if adaptive:
+                detail["adaptive_support"] = "Yes"
+        else:
+            letters.append(match.group("badge"))
+
+    found_types = list(dict.fromkeys(TEST_TYPE_MAP[l] for l in letters if l in TEST_TYPE_MAP))
+    if found_types:
+        detail["test_types"] = found_types
+
+    return detail
+
+
+def parse_test_type_badges(el: etree._Element) -> list[str]:
+
+    spans = _SPANS(el)
+    badges = [
+        s for s in spans
+        if _BADGE_CLASS_RE.search(" ".join(s.get("class", "").split()))
+    ]
+    if not badges:
+        # Try generic badge pattern used in SHL catalog rows
+        badges = [s for s in spans if "type" in s.get("class", "").lower()]
+    letters = [t for t in (_text(b) for b in badges) if t in TEST_TYPE_MAP]
+    return [TEST_TYPE_MAP[l] for l in letters]
+
+
+def parse_catalog_html(html: str, base_url: str) -> tuple[list[dict], Optional[str]]:
+
+    root = _parse(html)
+    if root is None:
+        return [], None
+    assessments = []
+
+    rows = _CATALOG_ROWS(root)
+    if not rows:
+        # Fallback: find all links to product detail pages
+        for link in _PRODUCT_LINKS(root):
+            name = _text(link)
+            if name:
+                assessments.append({
+                    "name": name,
+                    "url": _absolute(link.get("href", ""), base_url),
+                    "test_types_raw": [],
+                })
+    else:
+        for row in rows:
+            links = _ROW_PRODUCT_LINK(row)
+            if not links:
+                continue
+            assessments.append({
+                "name": _text(links[0]),
+                "url": _absolute(links[0].get("href", ""), base_url),
+                "test_types_raw": parse_test_type_badges(row),
+            })
+
+    # Next page
+    next_links = _NEXT_LINK(root)
+    next_link = next_links[0] if next_links else None
+    if next_link is None:
+        # Try finding pagination by text
+        next_link = next(
+            (a for a in _ANCHORS(root) if _NEXT_TEXT_RE.search(_single_string(a) or "")),
+            None,
+        )
+    next_url = None
+    if next_link is not None:
+        href = next_link.get("href", "")
+        if href:
+            next_url = _absolute(href, base_url)
+
+    return assessments, next_url
+
+
+def find_individual_test_url(html: str, base_url: str, catalog_url: str) -> str:
+
+    root = _parse(html)
+    links = _LINKS(root) if root is not None else []
+
+    # Look for a tab/link labeled 'Individual Test Solutions'
+    for a in links:
+        text = _text(a).lower()
+        if "individual" in text and "test" in text:
+            return _absolute(a.get("href"), base_url)
+
+    for a in links:
+        href = a.get("href")
+        if "type=1" in href or "individual" in href.lower():
+            return _absolute(href, base_url)
+
+    # Default: the catalog URL with type filter for individual solutions
+    # Based on SHL's typical URL pattern
+    return catalog_url + "?type=1"
+
+
+def parse_paginated_links(html: str, base_url: str) -> list[dict]:
+
+    root = _parse(html)
+    if root is None:
+        return []
+    items = []
+    for link in _PRODUCT_LINKS(root):
+        name = _text(link)
+        if name:
+            parent = link.getparent()
+            items.append({
+                "name": name,
+                "url": _absolute(link.get("href", ""), base_url),
+                "test_types_raw": parse_test_type_badges(parent if parent is not None else link),
+            })
+    return items
@@ -1,14 +1,26 @@
 
 
 import json
-import time
 import logging
-import re
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterator, Optional
 
 import requests
-from bs4 import BeautifulSoup
+
+from crawler.fetch import Fetcher
+from crawler.http_cache import HttpCache
+from crawler.journal import JOURNAL_PATH, CrawlJournal, JournalState
+from crawler.parsing import (
+    empty_detail,
+    find_individual_test_url,
+    parse_assessment_detail,
+    parse_catalog_html,
+    parse_paginated_links,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,8 +28,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-BASE_URL = "https://www.shl.com"
-CATALOG_URL = "https://www.shl.com/solutions/products/product-catalog/"
+# Point SHL_CRAWL_BASE_URL at a local server to crawl saved catalog fixtures
+BASE_URL = os.getenv("SHL_CRAWL_BASE_URL", "https://www.shl.com").rstrip("/")
+CATALOG_URL = BASE_URL + "/solutions/products/product-catalog/"
 MIN_REQUIRED_ASSESSMENTS = 377
 HEADERS = {
     "User-Agent": (
@@ -27,210 +40,245 @@ HEADERS = {
     ),
     "Accept-Language": "en-US,en;q=0.9",
 }
-REQUEST_DELAY = 0.5  # seconds between requests
+# Detail pages are fetched by CRAWL_CONCURRENCY workers over one pooled session,
+# throttled per host by a token bucket (average rate, burst size)
+CRAWL_CONCURRENCY = int(os.getenv("SHL_CRAWL_CONCURRENCY", "8"))
+IN_FLIGHT_PER_WORKER = 2  # detail pages submitted ahead of the consumer, per worker
+REQUESTS_PER_SECOND = float(os.getenv("SHL_CRAWL_RATE", "4"))
+REQUEST_BURST = float(os.getenv("SHL_CRAWL_BURST", "4"))
+# Conditional-request cache: unchanged pages come back as 304 and reuse the
+# cached parse. Offline mode crawls purely from the cache.
+HTTP_CACHE_ENABLED = os.getenv("SHL_HTTP_CACHE", "1") != "0"
+CRAWL_OFFLINE = os.getenv("SHL_CRAWL_OFFLINE", "0") == "1"
+PARSER_VERSION = 3  # bump when parsing changes, to invalidate cached parses
 OUTPUT_PATH = Path(__file__).parent.parent / "data" / "assessments.json"
 
 
-TEST_TYPE_MAP = {
-    "A": "Ability & Aptitude",
-    "B": "Biodata & Situational Judgement",
-    "C": "Competencies",
-    "D": "Development & 360",
-    "E": "Assessment Exercises",
-    "K": "Knowledge & Skills",
-    "P": "Personality & Behaviour",
-    "S": "Simulations",
-}
+_fetcher: Optional[Fetcher] = None
+_http_cache: Optional[HttpCache] = None
+_offline = False
 
 
-def _get(url: str, retries: int = 3) -> Optional[requests.Response]:
-    
-    for attempt in range(retries):
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=30)
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException as exc:
-            logger.warning("Attempt %d failed for %s: %s", attempt + 1, url, exc)
-            time.sleep(2 ** attempt)
-    logger.error("All retries exhausted for %s", url)
-    return None
+def _get_fetcher() -> Fetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = Fetcher(
+            headers=HEADERS,
+            rate_per_host=REQUESTS_PER_SECOND,
+            burst=REQUEST_BURST,
+            max_connections=CRAWL_CONCURRENCY,
+        )
+    return _fetcher
 
 
-def _parse_test_type_badges(tag) -> list[str]:
+def _get(url: str) -> Optional[requests.Response]:
     
-    badges = tag.find_all("span", class_=re.compile(r"product-catalogue.*type", re.I))
-    if not badges:
-        # Try generic badge pattern used in SHL catalog rows
-        badges = tag.find_all("span", attrs={"class": lambda c: c and "type" in c.lower()})
-    letters = [b.get_text(strip=True) for b in badges if b.get_text(strip=True) in TEST_TYPE_MAP]
-    return [TEST_TYPE_MAP[l] for l in letters]
+    return _get_fetcher().get(url)
 
 
-def _scrape_assessment_detail(url: str) -> dict:
-    
-    detail = {
-        "description": "",
-        "duration": None,
-        "remote_support": "No",
-        "adaptive_support": "No",
-        "test_types": [],
-    }
-    resp = _get(url)
-    if resp is None:
-        return detail
-
-    soup = BeautifulSoup(resp.text, "lxml")
+def _fetch_parsed(url: str, kind: str, parse: Callable[[str], Any]) -> Optional[Any]:
+    """
+    `parse(html)` for a page, going through the HTTP cache when enabled:
+    a 304 reuses the cached parse, and offline mode never touches the network.
+    """
+    cache = _http_cache
+    if cache is None:
+        resp = _get(url)
+        return parse(resp.text) if resp is not None else None
+
+    page = cache.get(url)
+    if _offline:
+        if page is None:
+            cache.count("missing")
+            logger.warning("Offline: %s is not in the HTTP cache", url)
+            return None
+        cache.count("offline")
+    else:
+        resp = _get_fetcher().get(url, headers=page.validators() if page else None)
+        if resp is None:
+            if page is None:
+                return None
+            cache.count("stale")
+            logger.warning("Using cached copy of %s after fetch failure", url)
+        elif resp.status_code == 304 and page is not None:
+            cache.count("not_modified")
+        else:
+            if resp.status_code == 304:
+                # Nothing cached for the 304 to refer to (the entry was lost, or
+                # something upstream revalidated on its own): its empty body is
+                # not the page, so fetch it again unconditionally
+                logger.warning("%s answered 304 with no cached copy; refetching", url)
+                resp = _get_fetcher().get(url)
+                if resp is None or resp.status_code == 304:
+                    cache.count("missing")
+                    return None
+            cache.count("fetched")
+            page = cache.put(url, resp.text, resp.headers)
+
+    value = page.parsed_value(kind, PARSER_VERSION)
+    if value is None:
+        value = parse(page.text)
+        cache.put_parsed(page, kind, PARSER_VERSION, value)
+    return value
 
-   
-    # SHL uses various containers; try multiple selectors
-    for sel in [
-        ".product-hero__description",
-        ".product-description",
-        "[class*='description']",
-        "article p",
-        ".hero p",
-    ]:
-        el = soup.select_one(sel)
-        if el and len(el.get_text(strip=True)) > 30:
-            detail["description"] = el.get_text(separator=" ", strip=True)
-            break
-
-    # Fallback: first substantial <p> in main content
-    if not detail["description"]:
-        for p in soup.find_all("p"):
-            text = p.get_text(strip=True)
-            if len(text) > 60:
-                detail["description"] = text
-                break
 
+def _scrape_assessment_detail(url: str) -> dict:
     
-    full_text = soup.get_text(separator=" ")
-    duration_match = re.search(
-        r"(\d+)\s*(?:minutes?|mins?)", full_text, re.IGNORECASE
-    )
-    if duration_match:
-        detail["duration"] = int(duration_match.group(1))
+    detail = _fetch_parsed(url, "detail", _parse_assessment_detail)
+    return detail if detail is not None else empty_detail()
 
-   
-    # SHL pages typically list these as key-value pairs
-    if re.search(r"remote\s+testing.*?yes", full_text, re.IGNORECASE):
-        detail["remote_support"] = "Yes"
-    if re.search(r"adaptive.*?yes|yes.*?adaptive", full_text, re.IGNORECASE):
-        detail["adaptive_support"] = "Yes"
-
-    # --- Test types from detail page badges ---
-    badge_letters = re.findall(r'\b([ABCDEKPS])\b', full_text)
-    found_types = list(dict.fromkeys(
-        TEST_TYPE_MAP[l] for l in badge_letters if l in TEST_TYPE_MAP
-    ))
-    if found_types:
-        detail["test_types"] = found_types
 
-    return detail
+def _parse_assessment_detail(html: str) -> dict:
+    return parse_assessment_detail(html)
 
 
 def _parse_catalog_page(url: str) -> tuple[list[dict], Optional[str]]:
     
-    resp = _get(url)
-    if resp is None:
+    parsed = _fetch_parsed(url, "listing", _parse_catalog_html)
+    if parsed is None:
         return [], None
+    assessments, next_url = parsed
+    return assessments, next_url
 
-    soup = BeautifulSoup(resp.text, "lxml")
-    assessments = []
 
-    
-    rows = soup.select("tr.js-product-row, .product-catalogue__row, [data-href*='product-catalog']")
-
-    if not rows:
-        # Fallback: find all links to product detail pages
-        links = soup.select("a[href*='/product-catalog/view/']")
-        for link in links:
-            href = link.get("href", "")
-            full_url = href if href.startswith("http") else BASE_URL + href
-            name = link.get_text(strip=True)
-            if name:
-                assessments.append({
-                    "name": name,
-                    "url": full_url,
-                    "test_types_raw": [],
-                })
-    else:
-        for row in rows:
-            link = row.select_one("a[href*='/product-catalog/view/']")
-            if not link:
-                continue
-            href = link.get("href", "")
-            full_url = href if href.startswith("http") else BASE_URL + href
-            name = link.get_text(strip=True)
-            test_types = _parse_test_type_badges(row)
-            assessments.append({
-                "name": name,
-                "url": full_url,
-                "test_types_raw": test_types,
-            })
-
-    # Next page
-    next_link = soup.select_one("a[rel='next'], .pagination__next a, a.next")
-    if not next_link:
-        # Try finding pagination by text
-        next_link = soup.find("a", string=re.compile(r"next", re.I))
-    next_url = None
-    if next_link:
-        href = next_link.get("href", "")
-        if href:
-            next_url = href if href.startswith("http") else BASE_URL + href
-
-    return assessments, next_url
+def _parse_catalog_html(html: str) -> tuple[list[dict], Optional[str]]:
+    return parse_catalog_html(html, BASE_URL)
 
 
 def _get_individual_test_catalog_url(base_url: str) -> str:
    
-    resp = _get(base_url)
-    if resp is None:
+    url = _fetch_parsed(base_url, "catalog_root", _find_individual_test_url)
+    if url is None:
         raise RuntimeError(f"Cannot load catalog base URL: {base_url}")
-
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # Look for a tab/link labeled 'Individual Test Solutions'
-    for a in soup.find_all("a", href=True):
-        text = a.get_text(strip=True)
-        if "individual" in text.lower() and "test" in text.lower():
-            href = a["href"]
-            return href if href.startswith("http") else BASE_URL + href
-
-    
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if "type=1" in href or "individual" in href.lower():
-            return href if href.startswith("http") else BASE_URL + href
-
-    # Default: the catalog URL with type filter for individual solutions
-    # Based on SHL's typical URL pattern
-    return CATALOG_URL + "?type=1"
-
-
-def crawl(skip_detail_pages: bool = False) -> list[dict]:
-    
-    logger.info("Starting SHL catalog crawl...")
-
-    # Step 1: Locate Individual Test Solutions URL
-    individual_url = _get_individual_test_catalog_url(CATALOG_URL)
-    logger.info("Individual Test Solutions URL: %s", individual_url)
+    return url
+
+
+def _find_individual_test_url(html: str) -> str:
+    return find_individual_test_url(html, BASE_URL, CATALOG_URL)
+
+
+def iter_crawl(
+    skip_detail_pages: bool = False,
+    concurrency: int = CRAWL_CONCURRENCY,
+    use_cache: bool = HTTP_CACHE_ENABLED,
+    offline: bool = CRAWL_OFFLINE,
+    resume: bool = True,
+    journal_path: Path = JOURNAL_PATH,
+) -> Iterator[dict]:
+    """
+    Yield assessments in catalog order as their detail pages finish, so
+    consumers (e.g. the streaming index build) work while the crawl is still
+    on the network. Every assessment is journaled first; an interrupted
+    crawl resumes after the last listing page and detail page it finished.
+    The finished journal is left for `crawl()` / `crawl_to_file()` to consume.
+    """
+    global _http_cache, _offline
+    _http_cache = HttpCache() if use_cache or offline else None
+    _offline = offline
+    logger.info("Starting SHL catalog crawl%s...", " (offline, from HTTP cache)" if offline else "")
+    journal = CrawlJournal(journal_path)
+    state = journal.open(resume=resume)
+
+    try:
+        unique_raw = state.listing
+        if unique_raw is None:
+            unique_raw = _crawl_listing(journal, state)
+            journal.record_listing_done(unique_raw)
+        else:
+            logger.info("Listing already complete in journal: %d assessments", len(unique_raw))
+        done = len([raw for raw in unique_raw if raw["url"] in state.details])
+        if done:
+            logger.info("Skipping %d detail pages finished by a previous run", done)
+
+        # Step 4: Scrape detail pages concurrently (the rate limiter paces the host)
+        def scrape(item: tuple[int, dict]) -> dict:
+            i, raw = item
+            offset = state.details.get(raw["url"])
+            if offset is not None:
+                return journal.read_detail(offset)
+            logger.info(
+                "Scraping detail page %d/%d: %s",
+                i + 1, len(unique_raw), raw["name"]
+            )
+            if skip_detail_pages:
+                detail = {
+                    "description": "",
+                    "duration": None,
+                    "remote_support": "No",
+                    "adaptive_support": "No",
+                    "test_types": raw.get("test_types_raw", []),
+                }
+            else:
+                detail = _scrape_assessment_detail(raw["url"])
+                # Merge test types from listing + detail page
+                combined_types = list(dict.fromkeys(
+                    raw.get("test_types_raw", []) + detail.get("test_types", [])
+                ))
+                detail["test_types"] = combined_types
+
+            assessment = {
+                "name": raw["name"],
+                "url": raw["url"],
+                "description": detail["description"],
+                "duration": detail["duration"],
+                "remote_support": detail["remote_support"],
+                "adaptive_support": detail["adaptive_support"],
+                "test_types": detail["test_types"],
+            }
+            journal.record_detail(assessment)
+            return assessment
+
+        workers = max(1, concurrency)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+        items = enumerate(unique_raw)
+        # Sliding window: at most IN_FLIGHT_PER_WORKER pages per worker are
+        # scraped ahead of the consumer, and the next page is submitted as each
+        # result is yielded, so a slow consumer holds the crawl back instead of
+        # letting finished pages pile up in memory
+        in_flight = deque(pool.submit(scrape, item) for item in islice(items, workers * IN_FLIGHT_PER_WORKER))
+        try:
+            while in_flight:
+                assessment = in_flight.popleft().result()
+                item = next(items, None)
+                if item is not None:
+                    in_flight.append(pool.submit(scrape, item))
+                yield assessment
+        finally:
+            # Don't keep crawling for a consumer that stopped early
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        journal.record_complete()
+    finally:
+        journal.close()
+
+    logger.info("Crawl complete. Total assessments: %d", len(unique_raw))
+    if _http_cache is not None:
+        logger.info("HTTP cache: %s", ", ".join(f"{k} {v}" for k, v in _http_cache.counts.items()))
+
+
+def _crawl_listing(journal: CrawlJournal, state: JournalState) -> list[dict]:
+    """Steps 1-3: the deduplicated listing, journaling each page as it is crawled."""
+    all_raw: list[dict] = list(state.listing_items)
+    if state.listing_pages:
+        current_url = state.next_listing_url
+        page_num = state.listing_pages + 1
+        logger.info("Resuming listing after page %d", state.listing_pages)
+    else:
+        # Step 1: Locate Individual Test Solutions URL
+        individual_url = _get_individual_test_catalog_url(CATALOG_URL)
+        logger.info("Individual Test Solutions URL: %s", individual_url)
+        current_url = individual_url
+        page_num = 1
 
     # Step 2: Paginate through all listing pages
-    all_raw: list[dict] = []
-    current_url = individual_url
-    page_num = 1
-
     while current_url:
         logger.info("Crawling listing page %d: %s", page_num, current_url)
         page_assessments, next_url = _parse_catalog_page(current_url)
         logger.info("  Found %d assessments on page %d", len(page_assessments), page_num)
+        journal.record_listing_page(current_url, page_assessments, next_url)
         all_raw.extend(page_assessments)
         current_url = next_url
         page_num += 1
-        time.sleep(REQUEST_DELAY)
 
     # Deduplicate by URL
     seen_urls = set()
@@ -263,46 +311,41 @@ def crawl(skip_detail_pages: bool = False) -> list[dict]:
             f"Required: {MIN_REQUIRED_ASSESSMENTS}. "
             "Check that the SHL catalog is accessible and pagination is working correctly."
         )
+    return unique_raw
 
-    # Step 4: Scrape detail pages for each assessment
-    final_assessments = []
-    for i, raw in enumerate(unique_raw):
-        logger.info(
-            "Scraping detail page %d/%d: %s",
-            i + 1, len(unique_raw), raw["name"]
-        )
-        if skip_detail_pages:
-            detail = {
-                "description": "",
-                "duration": None,
-                "remote_support": "No",
-                "adaptive_support": "No",
-                "test_types": raw.get("test_types_raw", []),
-            }
-        else:
-            detail = _scrape_assessment_detail(raw["url"])
-            # Merge test types from listing + detail page
-            combined_types = list(dict.fromkeys(
-                raw.get("test_types_raw", []) + detail.get("test_types", [])
-            ))
-            detail["test_types"] = combined_types
-            time.sleep(REQUEST_DELAY)
-
-        assessment = {
-            "name": raw["name"],
-            "url": raw["url"],
-            "description": detail["description"],
-            "duration": detail["duration"],
-            "remote_support": detail["remote_support"],
-            "adaptive_support": detail["adaptive_support"],
-            "test_types": detail["test_types"],
-        }
-        final_assessments.append(assessment)
-
-    logger.info("Crawl complete. Total assessments: %d", len(final_assessments))
+
+def crawl(
+    skip_detail_pages: bool = False,
+    concurrency: int = CRAWL_CONCURRENCY,
+    use_cache: bool = HTTP_CACHE_ENABLED,
+    offline: bool = CRAWL_OFFLINE,
+    resume: bool = True,
+    journal_path: Path = JOURNAL_PATH,
+) -> list[dict]:
+    
+    final_assessments = list(iter_crawl(
+        skip_detail_pages, concurrency, use_cache, offline, resume, journal_path
+    ))
+    CrawlJournal(journal_path).discard()
     return final_assessments
 
 
+def crawl_to_file(
+    path: Path = OUTPUT_PATH,
+    skip_detail_pages: bool = False,
+    concurrency: int = CRAWL_CONCURRENCY,
+    use_cache: bool = HTTP_CACHE_ENABLED,
+    offline: bool = CRAWL_OFFLINE,
+    resume: bool = True,
+    journal_path: Path = JOURNAL_PATH,
+) -> int:
+    """Crawl and compact the journal straight into `path`, one assessment in memory at a time."""
+    for _ in iter_crawl(skip_detail_pages, concurrency, use_cache, offline, resume, journal_path):
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return CrawlJournal(journal_path).compact(path)
+
+
 def _crawl_paginated(base_url: str) -> list[dict]:
     
     results = []
@@ -314,28 +357,17 @@ def _crawl_paginated(base_url: str) -> list[dict]:
     while consecutive_empty < 3:
         url = f"{base_url}?start={start}&type=1"
         logger.info("Paginated crawl: start=%d", start)
-        resp = _get(url)
-        if resp is None:
+        page_links = _fetch_parsed(url, "paginated", _parse_paginated_links)
+        if page_links is None:
             consecutive_empty += 1
             start += step
             continue
 
-        soup = BeautifulSoup(resp.text, "lxml")
-        links = soup.select("a[href*='/product-catalog/view/']")
         new_count = 0
-
-        for link in links:
-            href = link.get("href", "")
-            full_url = href if href.startswith("http") else BASE_URL + href
-            name = link.get_text(strip=True)
-            if name and full_url not in seen_urls:
-                seen_urls.add(full_url)
-                test_types = _parse_test_type_badges(link.parent or link)
-                results.append({
-                    "name": name,
-                    "url": full_url,
-                    "test_types_raw": test_types,
-                })
+        for item in page_links:
+            if item["url"] not in seen_urls:
+                seen_urls.add(item["url"])
+                results.append(item)
                 new_count += 1
 
         if new_count == 0:
@@ -344,11 +376,14 @@ def _crawl_paginated(base_url: str) -> list[dict]:
             consecutive_empty = 0
 
         start += step
-        time.sleep(REQUEST_DELAY)
 
     return results
 
 
+def _parse_paginated_links(html: str) -> list[dict]:
+    return parse_paginated_links(html, BASE_URL)
+
+
 def save(assessments: list[dict], path: Path = OUTPUT_PATH) -> None:
     """Persist assessments to JSON."""
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -364,6 +399,19 @@ def load(path: Path = OUTPUT_PATH) -> list[dict]:
 
 
 if __name__ == "__main__":
-    assessments = crawl(skip_detail_pages=False)
-    save(assessments)
-    print(f"\n Crawl complete: {len(assessments)} assessments saved to {OUTPUT_PATH}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl the SHL product catalog")
+    parser.add_argument("--offline", action="store_true", help="Crawl purely from the HTTP cache")
+    parser.add_argument("--no_cache", action="store_true", help="Bypass the HTTP cache")
+    parser.add_argument("--restart", action="store_true", help="Ignore the crawl journal and start over")
+    args = parser.parse_args()
+
+    count = crawl_to_file(
+        OUTPUT_PATH,
+        skip_detail_pages=False,
+        use_cache=not args.no_cache,
+        offline=args.offline or CRAWL_OFFLINE,
+        resume=not args.restart,
+    )
+    print(f"\n Crawl complete: {count} assessments saved to {OUTPUT_PATH}")
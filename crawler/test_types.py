@@ -0,0 +1,11 @@
+# SHL catalog badge letter → test type label
+TEST_TYPE_MAP = {
+    "A": "Ability & Aptitude",
+    "B": "Biodata & Situational Judgement",
+    "C": "Competencies",
+    "D": "Development & 360",
+    "E": "Assessment Exercises",
+    "K": "Knowledge & Skills",
+    "P": "Personality & Behaviour",
+    "S": "Simulations",
+}
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import faiss
+
+from embeddings.delta import DeltaLog, DeltaOp
+from embeddings.lexical import LexicalIndex
+from embeddings.metadata_store import MetadataStore
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 2  # 2: stable per-URL `ids` column replaces url_codes
+BUNDLE_DIR = Path(__file__).parent.parent / "data" / "index_bundle"
+MANIFEST_NAME = "manifest.json"
+VECTORS_NAME = "vectors.faiss"
+META_DIRNAME = "meta"
+LEXICAL_NAME = "bm25.npz"
+LEXICAL_VOCAB_NAME = "bm25_vocab.json"
+DELTA_DIRNAME = "delta"  # append-only upserts/removals, folded in by compaction
+
+
+class BundleError(ValueError):
+    """The index bundle is missing, corrupt, or incompatible with the encoder."""
+
+
+@dataclass
+class IndexBundle:
+    index: faiss.Index
+    meta: MetadataStore
+    lexical: Optional[LexicalIndex]
+    manifest: dict
+
+    @property
+    def version(self) -> str:
+        return self.manifest.get("version", "unversioned")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_bundle(
+    index: faiss.Index,
+    meta: MetadataStore,
+    lexical: Optional[LexicalIndex],
+    model_name: str,
+    encoder: str,
+    bundle_dir: Path = BUNDLE_DIR,
+    extra: Optional[dict] = None,
+    delta: Sequence[DeltaOp] = (),
+) -> dict:
+    """
+    Write index, metadata and lexical index as one versioned bundle, with
+    `delta` as the start of its delta log.
+
+    Each bundle is written to its own sibling directory
+    (`index_bundle.v<version>-<n>`), and `bundle_dir` is a symlink to the
+    current one. It is repointed with a single atomic rename, so at every
+    moment `bundle_dir` is either the old bundle or the new one. Returns
+    the manifest.
+    """
+    staging = bundle_dir.with_name(f"{bundle_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    faiss.write_index(index, str(staging / VECTORS_NAME))
+    files = [staging / VECTORS_NAME]
+    files.extend(meta.save(staging / META_DIRNAME))
+    if lexical is not None:
+        lexical.save(staging / LEXICAL_NAME, staging / LEXICAL_VOCAB_NAME)
+        files.extend([staging / LEXICAL_NAME, staging / LEXICAL_VOCAB_NAME])
+
+    checksums = {str(p.relative_to(staging)): _sha256(p) for p in files}
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "version": hashlib.sha256(
+            json.dumps(checksums, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "model_name": model_name,
+        "encoder": encoder,
+        "dim": index.d,
+        "count": index.ntotal,
+        "metadata_rows": len(meta),
+        "lexical": lexical is not None,
+        "files": checksums,
+        **(extra or {}),
+    }
+    with open(staging / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    if delta:
+        DeltaLog(staging / DELTA_DIRNAME, index.d).append(list(delta))
+
+    target = bundle_dir.with_name(f"{bundle_dir.name}.v{manifest['version']}-{time.time_ns():x}")
+    os.replace(staging, target)
+    _publish(bundle_dir, target)
+
+    logger.info(
+        "Index bundle %s written to %s (%d vectors, dim %d)",
+        manifest["version"], bundle_dir, manifest["count"], manifest["dim"],
+    )
+    return manifest
+
+
+def migrate_legacy_layout(bundle_dir: Path = BUNDLE_DIR) -> None:
+    """
+    Move a bundle written before the symlink layout under a versioned name
+    and link `bundle_dir` to it (the one moment readers can find no bundle
+    at all). No-op for the symlink layout.
+    """
+    if bundle_dir.is_dir() and not bundle_dir.is_symlink():
+        legacy = bundle_dir.with_name(f"{bundle_dir.name}.v0-legacy-{time.time_ns():x}")
+        os.replace(bundle_dir, legacy)
+        os.symlink(legacy.name, bundle_dir)
+
+
+def _publish(bundle_dir: Path, target: Path) -> None:
+    """Point the `bundle_dir` symlink at `target` atomically and prune old bundles."""
+    migrate_legacy_layout(bundle_dir)
+    link = bundle_dir.with_name(f"{bundle_dir.name}.link-{os.getpid()}")
+    link.unlink(missing_ok=True)
+    os.symlink(target.name, link)
+    previous = bundle_dir.resolve() if bundle_dir.is_symlink() else None
+    os.replace(link, bundle_dir)
+
+    # Keep the bundle just replaced for readers that resolved the link before
+    # the swap and are still opening it; older ones go (mmapped files outlive deletion)
+    keep = {target.resolve(), previous}
+    for old in bundle_dir.parent.glob(f"{bundle_dir.name}.v*"):
+        if old.resolve() not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def read_manifest(bundle_dir: Path = BUNDLE_DIR) -> dict:
+    path = bundle_dir / MANIFEST_NAME
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Index bundle not found at {bundle_dir}. Run: python -m embeddings.index_builder"
+        )
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise BundleError(
+            f"Index bundle format {manifest.get('format_version')} is not supported "
+            f"(expected {BUNDLE_FORMAT_VERSION}). Rebuild the index."
+        )
+    return manifest
+
+
+def verify_bundle(bundle_dir: Path = BUNDLE_DIR) -> dict:
+    """Re-hash every file against the manifest; raises BundleError on mismatch."""
+    manifest = read_manifest(bundle_dir)
+    for name, expected in manifest["files"].items():
+        path = bundle_dir / name
+        if not path.exists() or _sha256(path) != expected:
+            raise BundleError(f"Index bundle file {name} is missing or does not match its checksum.")
+    return manifest
+
+
+def check_encoder_compatible(manifest: dict, model_name: str, dim: int) -> None:
+    """Fail fast if the bundle was built with a different model or dimension."""
+    if manifest.get("model_name") not in (None, model_name):
+        raise BundleError(
+            f"Index bundle was built with model '{manifest['model_name']}' "
+            f"but the recommender is using '{model_name}'. Rebuild the index."
+        )
+    if manifest.get("dim") != dim:
+        raise BundleError(
+            f"Index bundle has {manifest.get('dim')}-dim vectors but the encoder "
+            f"produces {dim}-dim embeddings. Rebuild the index."
+        )
+
+
+def load_bundle(bundle_dir: Path = BUNDLE_DIR, verify: bool = False) -> IndexBundle:
+    """Memory-map a bundle: FAISS vectors, columnar metadata and lexical index."""
+    # Resolve the symlink once, so every file comes from the same bundle
+    # even if a new one is published mid-load
+    bundle_dir = bundle_dir.resolve()
+    manifest = verify_bundle(bundle_dir) if verify else read_manifest(bundle_dir)
+
+    index = faiss.read_index(
+        str(bundle_dir / VECTORS_NAME), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    )
+    meta = MetadataStore.load(bundle_dir / META_DIRNAME)
+    if index.ntotal != manifest["count"] or len(meta) != manifest["metadata_rows"]:
+        raise BundleError(
+            f"Index bundle {bundle_dir} is inconsistent with its manifest "
+            f"({index.ntotal} vectors, {len(meta)} metadata rows)."
+        )
+
+    lexical = None
+    if manifest.get("lexical"):
+        lexical = LexicalIndex.load(bundle_dir / LEXICAL_NAME, bundle_dir / LEXICAL_VOCAB_NAME)
+
+    logger.info(
+        "Loaded index bundle %s (%d vectors, dim %d, model %s)",
+        manifest["version"], index.ntotal, index.d, manifest.get("model_name"),
+    )
+    return IndexBundle(index=index, meta=meta, lexical=lexical, manifest=manifest)
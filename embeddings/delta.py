@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+OPS_NAME = "ops.jsonl"
+VECTORS_NAME = "vectors.f32"
+LOCK_NAME = "lock"
+SEALED_NAME = "sealed"  # written by compaction once the log is folded into a newer bundle
+
+UPSERT = "upsert"
+REMOVE = "remove"
+
+
+class DeltaLogSealed(RuntimeError):
+    """The log was compacted into a newer bundle; append to that bundle's log instead."""
+
+
+@dataclass
+class DeltaOp:
+    op: str  # UPSERT or REMOVE
+    id: int
+    record: Optional[dict] = None
+    vector: Optional[np.ndarray] = None
+
+
+class DeltaLog:
+    """
+    Append-only log of upserts and removals on top of an index bundle.
+
+    Vectors go to a raw float32 file and ops to a JSONL file that refers to
+    vector rows. Vectors are written and fsynced before the ops that use
+    them, so a crash mid-append leaves at worst unreferenced vectors or a
+    torn last line, both ignored on read. Compaction folds the log into a
+    new bundle, which replaces this directory.
+
+    Appends and compaction take an exclusive file lock, so they can run in
+    different processes. Once compaction has carried the log into the new
+    bundle it seals this one, and further appends raise DeltaLogSealed.
+    """
+
+    def __init__(self, directory: Path, dim: int):
+        self.dir = directory
+        self.dim = dim
+        self.ops_path = directory / OPS_NAME
+        self.vectors_path = directory / VECTORS_NAME
+
+    def _n_vectors(self) -> int:
+        if not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (4 * self.dim)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the log's exclusive lock (shared with other processes)."""
+        # Not parents=True: a bundle pruned after compaction must not be recreated
+        self.dir.mkdir(exist_ok=True)
+        with open(self.dir / LOCK_NAME, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @property
+    def sealed(self) -> bool:
+        # A pruned bundle directory means the log was compacted long ago
+        return (self.dir / SEALED_NAME).exists() or not self.dir.parent.exists()
+
+    def seal(self, successor: Path) -> None:
+        """Mark the log as folded into `successor`; call with the lock held."""
+        with open(self.dir / SEALED_NAME, "w", encoding="utf-8") as f:
+            f.write(f"{successor}\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, ops: list[DeltaOp]) -> None:
+        with self.locked():
+            if self.sealed:
+                raise DeltaLogSealed(f"Delta log {self.dir} has been compacted into a newer bundle.")
+            self._append(ops)
+
+    def _append(self, ops: list[DeltaOp]) -> None:
+        vector_row = self._n_vectors()
+        vectors = [op.vector for op in ops if op.op == UPSERT]
+        if vectors:
+            with open(self.vectors_path, "ab") as f:
+                # Drop any torn trailing row first so rows stay aligned
+                f.truncate(vector_row * 4 * self.dim)
+                f.write(np.ascontiguousarray(np.stack(vectors), dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        lines = []
+        for op in ops:
+            entry = {"op": op.op, "id": op.id}
+            if op.op == UPSERT:
+                entry["record"] = op.record
+                entry["vector_row"] = vector_row
+                vector_row += 1
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        with open(self.ops_path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self) -> list[DeltaOp]:
+        """All complete ops in log order, with their vectors."""
+        if not self.ops_path.exists():
+            return []
+        n_vectors = self._n_vectors()
+        vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_vectors, self.dim))
+            if n_vectors else None
+        )
+
+        ops = []
+        with open(self.ops_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn write
+                entry = json.loads(line)
+                if entry["op"] == REMOVE:
+                    ops.append(DeltaOp(REMOVE, entry["id"]))
+                    continue
+                if entry["vector_row"] >= n_vectors:
+                    break
+                ops.append(DeltaOp(
+                    UPSERT, entry["id"], entry["record"],
+                    np.array(vectors[entry["vector_row"]]),
+                ))
+        return ops
+
+
+@dataclass
+class DeltaState:
+    """
+    Logical rows of an index bundle plus its delta: base rows 0..N-1 keep
+    their positions, upserted rows are appended as N, N+1, ... and removed or
+    superseded rows are masked out of `live`. Each `apply()` returns a new
+    state, so readers of an older state are never affected.
+    """
+    base_ids: np.ndarray  # stable id per base row
+    base_order: np.ndarray  # argsort of base_ids, for id → row lookup
+    live: np.ndarray  # bool per logical row
+    records: list[dict] = field(default_factory=list)
+    vectors: Optional[np.ndarray] = None  # delta rows, (len(records), dim)
+    delta_rows: dict[int, int] = field(default_factory=dict)  # id → live delta row
+    seq: int = 0  # ops applied so far
+
+    @classmethod
+    def empty(cls, base_ids: np.ndarray, dim: int) -> "DeltaState":
+        return cls(
+            base_ids=base_ids,
+            base_order=np.argsort(base_ids, kind="stable"),
+            live=np.ones(len(base_ids), dtype=bool),
+            vectors=np.empty((0, dim), dtype=np.float32),
+        )
+
+    @property
+    def base_rows(self) -> int:
+        return len(self.base_ids)
+
+    @property
+    def all_live(self) -> bool:
+        return bool(self.live.all())
+
+    def row_of(self, assessment_id: int) -> Optional[int]:
+        """Live logical row of an assessment, or None."""
+        row = self.delta_rows.get(assessment_id)
+        if row is not None:
+            return row
+        pos = np.searchsorted(self.base_ids, assessment_id, sorter=self.base_order)
+        for i in self.base_order[pos:]:
+            if self.base_ids[i] != assessment_id:
+                break
+            if self.live[i]:
+                return int(i)
+        return None
+
+    def apply(self, ops: list[DeltaOp]) -> "DeltaState":
+        live = [self.live]
+        records = list(self.records)
+        vectors = [self.vectors]
+        delta_rows = dict(self.delta_rows)
+        n_rows = len(self.live)
+        dead: set[int] = set()
+
+        for op in ops:
+            row = delta_rows.pop(op.id, None)
+            if row is None:
+                row = self.row_of(op.id)
+                # A base row removed earlier in this batch must stay removed
+                if row is not None and row in dead:
+                    row = None
+            if row is not None:
+                dead.add(row)
+            if op.op == UPSERT:
+                records.append(op.record)
+                vectors.append(op.vector[None, :].astype(np.float32))
+                delta_rows[op.id] = n_rows
+                n_rows += 1
+
+        live = np.concatenate(live + [np.ones(n_rows - len(self.live), dtype=bool)])
+        live[list(dead)] = False
+        return DeltaState(
+            base_ids=self.base_ids,
+            base_order=self.base_order,
+            live=live,
+            records=records,
+            vectors=np.concatenate(vectors),
+            delta_rows=delta_rows,
+            seq=self.seq + len(ops),
+        )
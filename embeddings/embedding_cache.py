@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR = Path(__file__).parent.parent / "data" / "embedding_cache"
+
+
+def document_key(encoder_name: str, document: str) -> str:
+    """Content address of a document's embedding under a given encoder."""
+    return hashlib.sha256(f"{encoder_name}\0{document}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store of document embeddings.
+
+    Vectors live in an append-only raw float32 file that is memory-mapped
+    for reads; `keys.txt` lists the content hash of each row in the same
+    order. A crash mid-append can leave either file longer than the other,
+    so only rows present in both are loaded, and both files are cut back to
+    those rows before the next append.
+    """
+
+    def __init__(self, encoder_name: str, cache_dir: Path = EMBEDDING_CACHE_DIR):
+        self.encoder_name = encoder_name
+        self.dir = cache_dir / re.sub(r"[^A-Za-z0-9._-]+", "_", encoder_name)
+        self.vectors_path = self.dir / "vectors.f32"
+        self.keys_path = self.dir / "keys.txt"
+        self.meta_path = self.dir / "cache_meta.json"
+        self.reused = 0
+        self.recomputed = 0
+
+        self.dim: Optional[int] = None
+        self.rows: dict[str, int] = {}
+        self.n_rows = 0  # rows with both a vector and a complete key line
+        self._keys_end = 0  # bytes of keys.txt covering those rows
+        if self.meta_path.exists():
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            n_vectors = self.vectors_path.stat().st_size // (4 * self.dim) if self.vectors_path.exists() else 0
+            if self.keys_path.exists():
+                with open(self.keys_path, "rb") as f:
+                    for line in f:
+                        if self.n_rows >= n_vectors or not line.endswith(b"\n"):
+                            break  # vector missing, or a torn key line
+                        self.rows[line.decode("utf-8").strip()] = self.n_rows
+                        self.n_rows += 1
+                        self._keys_end += len(line)
+        logger.info("Embedding cache %s: %d cached vectors", self.dir, len(self.rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _vectors(self) -> np.ndarray:
+        if not self.rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.n_rows, self.dim))
+
+    def _append(self, keys: list[str], vectors: np.ndarray) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"encoder": self.encoder_name, "dim": self.dim}, f)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} does not match cache dim {self.dim}.")
+
+        lines = "".join(k + "\n" for k in keys).encode("utf-8")
+        with open(self.vectors_path, "ab") as f:
+            # Drop orphan vectors from an interrupted append so rows stay aligned
+            f.truncate(self.n_rows * 4 * self.dim)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.keys_path, "ab") as f:
+            f.truncate(self._keys_end)
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        for i, key in enumerate(keys):
+            self.rows[key] = self.n_rows + i
+        self.n_rows += len(keys)
+        self._keys_end += len(lines)
+
+    def encode(
+        self,
+        documents: list[str],
+        encode_fn: Callable[[list[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embeddings for `documents`, reusing cached vectors and calling
+        `encode_fn` only on new or changed documents (deduplicated).
+        """
+        keys = [document_key(self.encoder_name, d) for d in documents]
+
+        missing: dict[str, str] = {}
+        for key, doc in zip(keys, documents):
+            if key not in self.rows and key not in missing:
+                missing[key] = doc
+
+        if missing:
+            logger.info("Encoding %d new/changed documents (%d cached)", len(missing), len(documents) - len(missing))
+            self._append(list(missing), encode_fn(list(missing.values())))
+
+        n_missing = sum(1 for k in keys if k in missing)
+        self.recomputed += n_missing
+        self.reused += len(keys) - n_missing
+
+        vectors = self._vectors()
+        return np.asarray(vectors[[self.rows[k] for k in keys]], dtype=np.float32)
+
+    def stats(self) -> dict:
+        return {
+            "cached_vectors": len(self.rows),
+            "reused": self.reused,
+            "recomputed": self.recomputed,
+        }
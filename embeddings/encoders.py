@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+ONNX_DIR = Path(os.getenv("SHL_ONNX_DIR", Path(__file__).parent.parent / "data" / "onnx"))
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_ENCODER_BACKEND = os.getenv("SHL_ENCODER_BACKEND", "torch")
+ENCODER_THREADS = int(os.getenv("SHL_ENCODER_THREADS", "0"))  # 0: library default
+
+
+def encoder_name(model_name: str, backend: str) -> str:
+    """Stable identifier of a model + backend pair, used in cache keys."""
+    return model_name if backend == "torch" else f"{model_name}+{backend}"
+
+
+class Encoder(Protocol):
+    name: str  # Identifies model + backend, e.g. for cache keys
+    dim: int
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text."""
+        ...
+
+
+class TorchEncoder:
+    """SentenceTransformer on PyTorch — the reference backend."""
+
+    def __init__(self, model_name: str = MODEL_NAME, threads: int = ENCODER_THREADS):
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name)
+        self.name = encoder_name(model_name, "torch")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32)
+
+
+def _onnx_model_dir(model_name: str, onnx_dir: Path) -> Path:
+    return onnx_dir / model_name.replace("/", "__")
+
+
+def export_onnx(
+    model_name: str = MODEL_NAME,
+    onnx_dir: Path = ONNX_DIR,
+    quantize: bool = False,
+) -> Path:
+    """Export the transformer to ONNX (and optionally int8) once; returns the model path."""
+    out_dir = _onnx_model_dir(model_name, onnx_dir)
+    fp32_path = out_dir / "model.onnx"
+    int8_path = out_dir / "model.int8.onnx"
+
+    if not fp32_path.exists():
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        # Loads from the local sentence-transformers cache when present
+        st = SentenceTransformer(model_name, device="cpu")
+        transformer = st[0].auto_model.eval()
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        dummy = st.tokenizer(["export"], return_tensors="pt")
+        input_names = ["input_ids", "attention_mask", "token_type_ids"]
+        logger.info("Exporting %s to ONNX at %s", model_name, fp32_path)
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(dummy[n] for n in input_names),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    n: {0: "batch", 1: "sequence"} for n in input_names + ["last_hidden_state"]
+                },
+                opset_version=14,
+            )
+        st.tokenizer.save_pretrained(str(out_dir))
+        with open(out_dir / "encoder_config.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model_name": model_name,
+                    "max_seq_length": st.max_seq_length,
+                    "dim": st.get_sentence_embedding_dimension(),
+                },
+                f,
+            )
+
+    if not quantize:
+        return fp32_path
+
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("Quantizing %s to int8 at %s", fp32_path.name, int8_path)
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxEncoder:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime (optionally int8 dynamic-quantized).
+
+    Reproduces the SentenceTransformer pipeline — tokenize, transformer,
+    attention-masked mean pooling, L2 normalization — without importing
+    torch at query time. The model is exported from the local weights on
+    first use and reused from `onnx_dir` afterwards.
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        quantize: bool = False,
+        onnx_dir: Path = ONNX_DIR,
+        threads: int = ENCODER_THREADS,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise ImportError(
+                "The ONNX encoder backend needs onnxruntime and tokenizers: "
+                "pip install onnxruntime tokenizers"
+            ) from exc
+
+        model_path = export_onnx(model_name, onnx_dir, quantize=quantize)
+        model_dir = model_path.parent
+        with open(model_dir / "encoder_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.name = encoder_name(model_name, "onnx-int8" if quantize else "onnx")
+        self.dim = config["dim"]
+        logger.info("Loaded ONNX encoder %s from %s", self.name, model_path)
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in batch], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in batch], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in batch], dtype=np.int64),
+            }
+            hidden = self.session.run(
+                None, {k: v for k, v in feeds.items() if k in self.input_names}
+            )[0]
+
+            # Mean pooling over real tokens, then L2 normalization
+            mask = feeds["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out[start:start + len(batch)] = pooled
+        return out
+
+
+def get_encoder(
+    model_name: str = MODEL_NAME,
+    backend: str = DEFAULT_ENCODER_BACKEND,
+    threads: int = ENCODER_THREADS,
+) -> Encoder:
+    """Instantiate the query/document encoder for a backend in ENCODER_BACKENDS."""
+    if backend == "torch":
+        return TorchEncoder(model_name, threads=threads)
+    if backend == "onnx":
+        return OnnxEncoder(model_name, quantize=False, threads=threads)
+    if backend == "onnx-int8":
+        return OnnxEncoder(model_name, quantize=True, threads=threads)
+    raise ValueError(f"Unknown encoder backend '{backend}'. Choose from: {', '.join(ENCODER_BACKENDS)}")
@@ -2,22 +2,38 @@
 
 import json
 import logging
+import os
 import pickle
+import shutil
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from embeddings.bundle import BUNDLE_DIR, DELTA_DIRNAME, MANIFEST_NAME, VECTORS_NAME, load_bundle, migrate_legacy_layout, write_bundle
+from embeddings.delta import OPS_NAME, DeltaLog, DeltaState
+from embeddings.embedding_cache import EMBEDDING_CACHE_DIR, EmbeddingCache
+from embeddings.encoders import DEFAULT_ENCODER_BACKEND, MODEL_NAME, encoder_name, get_encoder
+from embeddings.index_spec import (
+    INDEX_COMPRESSION, INDEX_PCA_DIM, INDEX_SPEC, IndexSpec, build_faiss_index, rebuild_like,
+    reconstruct_all, resolve_spec,
+)
+from embeddings.lexical import LexicalIndex, LexicalIndexBuilder
+from embeddings.metadata_store import MetadataStore, MetadataWriter
+
 logger = logging.getLogger(__name__)
 
-MODEL_NAME = "all-MiniLM-L6-v2"
 DATA_DIR = Path(__file__).parent.parent / "data"
 ASSESSMENTS_PATH = DATA_DIR / "assessments.json"
+# Legacy loose artifacts, still readable when no bundle has been built
 FAISS_INDEX_PATH = DATA_DIR / "faiss.index"
 META_PATH = DATA_DIR / "index_meta.json"
+LEXICAL_INDEX_PATH = DATA_DIR / "bm25.npz"
+LEXICAL_VOCAB_PATH = DATA_DIR / "bm25_vocab.json"
+STREAM_BATCH_SIZE = 64  # assessments encoded per step by build_index_streaming
 
 
 def _build_document(assessment: dict) -> str:
@@ -46,72 +62,287 @@ def _build_document(assessment: dict) -> str:
     return " | ".join(parts)
 
 
+def _metadata_record(assessment: dict) -> dict:
+    """The fields of an assessment kept alongside its index row."""
+    return {
+        "name": assessment.get("name", ""),
+        "url": assessment.get("url", ""),
+        "description": assessment.get("description", ""),
+        "duration": assessment.get("duration"),
+        "remote_support": assessment.get("remote_support", "No"),
+        "adaptive_support": assessment.get("adaptive_support", "No"),
+        "test_types": assessment.get("test_types", []),
+    }
+
+
+def _document_encoder(
+    model_name: str,
+    encoder_backend: str,
+    use_embedding_cache: bool,
+    embedding_cache_dir: Path,
+) -> tuple[Callable[[list[str]], np.ndarray], Optional[EmbeddingCache]]:
+    """`encode(documents)` for index building, going through the embedding cache when enabled."""
+    # The encoder is only loaded if some document actually needs encoding
+    encoder = None
+
+    def encode(texts: list[str]) -> np.ndarray:
+        nonlocal encoder
+        if encoder is None:
+            logger.info("Loading %s encoder: %s", encoder_backend, model_name)
+            encoder = get_encoder(model_name, encoder_backend)
+        logger.info("Generating embeddings for %d documents...", len(texts))
+        # Normalized embeddings: cosine similarity via inner product
+        return encoder.encode(texts, batch_size=64, show_progress_bar=len(texts) > 64)
+
+    if not use_embedding_cache:
+        return encode, None
+    cache = EmbeddingCache(encoder_name(model_name, encoder_backend), embedding_cache_dir)
+    return (lambda texts: cache.encode(texts, encode)), cache
+
+
+def _log_cache_stats(cache: Optional[EmbeddingCache]) -> None:
+    if cache is None:
+        return
+    stats = cache.stats()
+    logger.info(
+        "Embedding cache: reused %d, recomputed %d (%d vectors cached)",
+        stats["reused"], stats["recomputed"], stats["cached_vectors"]
+    )
+
+
+def _write_index(
+    index: faiss.Index,
+    documents: list[str],
+    meta: list[dict],
+    model_name: str,
+    encoder_backend: str,
+    bundle_dir: Path,
+    spec: IndexSpec,
+) -> MetadataStore:
+    logger.info("FAISS index %s built with %d vectors", spec, index.ntotal)
+
+    # Sparse BM25 index over the same documents, for hybrid retrieval
+    lexical = LexicalIndex.build(documents)
+
+    # Save as one versioned bundle (vectors + columnar metadata + BM25)
+    store = MetadataStore.from_records(meta)
+    write_bundle(
+        index,
+        store,
+        lexical,
+        model_name=model_name,
+        encoder=encoder_name(model_name, encoder_backend),
+        bundle_dir=bundle_dir,
+        extra={"index_spec": str(spec)},
+    )
+    return store
+
+
 def build_index(
     assessments_path: Path = ASSESSMENTS_PATH,
-    faiss_path: Path = FAISS_INDEX_PATH,
-    meta_path: Path = META_PATH,
     model_name: str = MODEL_NAME,
-) -> tuple[faiss.Index, list[dict]]:
+    encoder_backend: str = DEFAULT_ENCODER_BACKEND,
+    use_embedding_cache: bool = True,
+    embedding_cache_dir: Path = EMBEDDING_CACHE_DIR,
+    bundle_dir: Path = BUNDLE_DIR,
+    index_spec: Optional[str] = INDEX_SPEC,
+    compression: str = INDEX_COMPRESSION,
+    pca_dim: int = INDEX_PCA_DIM,
+) -> tuple[faiss.Index, MetadataStore]:
     
+    from embeddings.parallel_builder import iter_records  # imports this module
+
     logger.info("Loading assessments from %s", assessments_path)
-    with open(assessments_path, "r", encoding="utf-8") as f:
-        assessments = json.load(f)
+    assessments = list(iter_records(Path(assessments_path)))
 
     logger.info("Loaded %d assessments", len(assessments))
-    logger.info("Loading SentenceTransformer model: %s", model_name)
-    model = SentenceTransformer(model_name)
 
     # Build text documents
     documents = [_build_document(a) for a in assessments]
 
-    logger.info("Generating embeddings...")
-    embeddings = model.encode(
-        documents,
-        batch_size=64,
-        show_progress_bar=True,
-        normalize_embeddings=True,  # Cosine similarity via inner product
-        convert_to_numpy=True,
-    )
+    encode, cache = _document_encoder(model_name, encoder_backend, use_embedding_cache, embedding_cache_dir)
+    embeddings = encode(documents)
+    _log_cache_stats(cache)
 
     dim = embeddings.shape[1]
     logger.info("Embedding dim: %d, Count: %d", dim, len(embeddings))
 
-    # Build FAISS index (Inner Product = cosine similarity when normalized)
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings.astype(np.float32))
-    logger.info("FAISS index built with %d vectors", index.ntotal)
+    # Build FAISS index (Inner Product = cosine similarity when normalized);
+    # exact for small catalogs, ANN per `index_spec` otherwise, optionally compressed
+    spec = resolve_spec(index_spec, len(embeddings), embeddings.shape[1], compression, pca_dim)
+    index = build_faiss_index(spec, embeddings)
 
     # Metadata aligned with index rows
-    meta = [
-        {
-            "name": a.get("name", ""),
-            "url": a.get("url", ""),
-            "description": a.get("description", ""),
-            "duration": a.get("duration"),
-            "remote_support": a.get("remote_support", "No"),
-            "adaptive_support": a.get("adaptive_support", "No"),
-            "test_types": a.get("test_types", []),
-        }
-        for a in assessments
-    ]
-
-    # Save
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(faiss_path))
-    with open(meta_path, "w", encoding="utf-8") as f:
-        json.dump(meta, f, indent=2, ensure_ascii=False)
-
-    logger.info("FAISS index saved to %s", faiss_path)
-    logger.info("Metadata saved to %s", meta_path)
+    meta = [_metadata_record(a) for a in assessments]
 
-    return index, meta
+    store = _write_index(index, documents, meta, model_name, encoder_backend, bundle_dir, spec)
+    return index, store
+
+
+def build_index_streaming(
+    assessments: Iterable[dict],
+    model_name: str = MODEL_NAME,
+    encoder_backend: str = DEFAULT_ENCODER_BACKEND,
+    use_embedding_cache: bool = True,
+    embedding_cache_dir: Path = EMBEDDING_CACHE_DIR,
+    bundle_dir: Path = BUNDLE_DIR,
+    batch_size: int = STREAM_BATCH_SIZE,
+    index_spec: Optional[str] = INDEX_SPEC,
+    compression: str = INDEX_COMPRESSION,
+    pca_dim: int = INDEX_PCA_DIM,
+) -> tuple[faiss.Index, MetadataStore]:
+    """
+    Same bundle as `build_index`, built from an iterable of assessments
+    (e.g. `crawler.shl_crawler.iter_crawl()`): each batch of `batch_size` is
+    encoded and added to the FAISS index as soon as it arrives, so encoding
+    overlaps with whatever produces the assessments. Metadata columns and
+    BM25 term counts are written as batches arrive too, so neither the
+    records nor the document texts are kept: memory beyond one batch is the
+    vectors themselves. Vectors stream into an exact index, which is rebuilt
+    per `index_spec` at the end if that asks for another index.
+    """
+    encode, cache = _document_encoder(model_name, encoder_backend, use_embedding_cache, embedding_cache_dir)
+    work_dir = bundle_dir.with_name(f"{bundle_dir.name}.build-{os.getpid()}")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    meta_writer = MetadataWriter(work_dir / "meta")
+    lexical = LexicalIndexBuilder()
+    index: Optional[faiss.Index] = None
+    batch: list[dict] = []
+    encode_seconds = 0.0
+    started = time.perf_counter()
+
+    def flush() -> None:
+        nonlocal index, encode_seconds
+        t0 = time.perf_counter()
+        docs = [_build_document(a) for a in batch]
+        embeddings = encode(docs)
+        if index is None:
+            index = faiss.IndexFlatIP(embeddings.shape[1])
+        index.add(embeddings.astype(np.float32))
+        encode_seconds += time.perf_counter() - t0
+        meta_writer.append([_metadata_record(a) for a in batch])
+        lexical.add(docs)
+        logger.info("Streamed %d assessments into the index", meta_writer.rows)
+        batch.clear()
+
+    for assessment in assessments:
+        batch.append(assessment)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    meta_writer.close()
+    if index is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise ValueError("No assessments to index.")
+
+    _log_cache_stats(cache)
+    logger.info(
+        "Streaming build: %d assessments in %.1fs, %.1fs of it encoding",
+        meta_writer.rows, time.perf_counter() - started, encode_seconds,
+    )
+    spec = resolve_spec(index_spec, index.ntotal, index.d, compression, pca_dim)
+    if spec.factory != "Flat":
+        index = build_faiss_index(spec, index.reconstruct_n(0, index.ntotal))
+    logger.info("FAISS index %s built with %d vectors", spec, index.ntotal)
+    # Memory-mapped; the mapping outlives the work directory's removal
+    store = MetadataStore.load(work_dir / "meta")
+    write_bundle(
+        index,
+        store,
+        lexical.build(),
+        model_name=model_name,
+        encoder=encoder_name(model_name, encoder_backend),
+        bundle_dir=bundle_dir,
+        extra={"index_spec": str(spec)},
+    )
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return index, store
+
+
+def live_records(bundle_dir: Path = BUNDLE_DIR) -> list[dict]:
+    """Metadata of every assessment the live index serves: the bundle with its delta log applied."""
+    current = bundle_dir.resolve()
+    bundle = load_bundle(current)
+    ops = DeltaLog(current / DELTA_DIRNAME, bundle.index.d).read()
+    state = DeltaState.empty(np.asarray(bundle.meta.ids), bundle.index.d).apply(ops)
+    records = [bundle.meta.record(int(r)) for r in np.flatnonzero(state.live[:state.base_rows])]
+    records += [_metadata_record(state.records[j]) for j in np.flatnonzero(state.live[state.base_rows:])]
+    return records
+
+
+def compact_index(bundle_dir: Path = BUNDLE_DIR) -> dict:
+    """
+    Fold the bundle's delta log (live upserts/removals) into a fresh bundle:
+    live rows only, BM25 rebuilt over them, no re-encoding. Returns the manifest.
+
+    Ops appended while the new bundle is built are carried over as the start
+    of its delta log; the old log is then sealed, so a running recommender
+    reloads onto the new bundle before its next append instead of losing it.
+    """
+    # The bundle the link points at now; its own log, even if the link moves
+    # (a pre-symlink bundle is moved first, or publishing would move it under us)
+    migrate_legacy_layout(bundle_dir)
+    current = bundle_dir.resolve()
+    bundle = load_bundle(current)
+    log = DeltaLog(current / DELTA_DIRNAME, bundle.index.d)
+    ops = log.read()
+    if not ops:
+        logger.info("No delta to compact in %s", bundle_dir)
+        return bundle.manifest
+
+    state = DeltaState.empty(np.asarray(bundle.meta.ids), bundle.index.d).apply(ops)
+    n_base = state.base_rows
+    base_live = np.flatnonzero(state.live[:n_base])
+    delta_live = np.flatnonzero(state.live[n_base:])
+
+    records = [bundle.meta.record(int(r)) for r in base_live]
+    records += [_metadata_record(state.records[j]) for j in delta_live]
+    # Same index type, trained state and knobs as the bundle; read in full,
+    # since memory-mapped IVF lists can't be copied
+    base_index = faiss.read_index(str(current / VECTORS_NAME))
+    vectors = np.concatenate([
+        reconstruct_all(base_index)[base_live],
+        state.vectors[delta_live],
+    ]).astype(np.float32)
+
+    spec = IndexSpec.parse(bundle.manifest.get("index_spec", "Flat"))
+    index = rebuild_like(base_index, vectors)
+    lexical = LexicalIndex.build([_build_document(r) for r in records]) if bundle.lexical else None
+    logger.info(
+        "Compacting %d delta ops: %d base rows kept, %d delta rows added",
+        len(ops), len(base_live), len(delta_live)
+    )
+    with log.locked():
+        if log.sealed or bundle_dir.resolve() != current:
+            raise RuntimeError(f"{bundle_dir} was replaced by another process while compacting.")
+        tail = log.read()[len(ops):]
+        if tail:
+            logger.info("Carrying %d delta ops appended during compaction", len(tail))
+        manifest = write_bundle(
+            index,
+            MetadataStore.from_records(records),
+            lexical,
+            model_name=bundle.manifest["model_name"],
+            encoder=bundle.manifest["encoder"],
+            bundle_dir=bundle_dir,
+            extra={"index_spec": str(spec)},
+            delta=tail,
+        )
+        log.seal(bundle_dir.resolve())
+    return manifest
 
 
 def load_index(
     faiss_path: Path = FAISS_INDEX_PATH,
     meta_path: Path = META_PATH,
-) -> tuple[faiss.Index, list[dict]]:
-    """Load FAISS index and metadata from disk."""
+    bundle_dir: Path = BUNDLE_DIR,
+) -> tuple[faiss.Index, MetadataStore]:
+    """Load FAISS index and columnar metadata, preferring the memory-mapped bundle."""
+    if (bundle_dir / MANIFEST_NAME).exists():
+        bundle = load_bundle(bundle_dir)
+        return bundle.index, bundle.meta
+
     if not faiss_path.exists():
         raise FileNotFoundError(
             f"FAISS index not found at {faiss_path}. "
@@ -125,13 +356,123 @@ def load_index(
 
     index = faiss.read_index(str(faiss_path))
     with open(meta_path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
+        meta = MetadataStore.from_records(json.load(f))
 
     logger.info("Loaded FAISS index (%d vectors) and %d metadata entries", index.ntotal, len(meta))
     return index, meta
 
 
+def load_lexical_index(
+    matrix_path: Path = LEXICAL_INDEX_PATH,
+    vocab_path: Path = LEXICAL_VOCAB_PATH,
+) -> Optional[LexicalIndex]:
+    """Load the BM25 index, or None if it has not been built yet."""
+    if not matrix_path.exists() or not vocab_path.exists():
+        logger.info(
+            "No lexical index at %s; hybrid retrieval disabled. "
+            "Rebuild with: python -m embeddings.index_builder", matrix_path
+        )
+        return None
+    lexical = LexicalIndex.load(matrix_path, vocab_path)
+    logger.info("Loaded lexical index (%d terms × %d docs)", len(lexical.vocab), lexical.n_docs)
+    return lexical
+
+
+def index_version(
+    faiss_path: Path = FAISS_INDEX_PATH,
+    meta_path: Path = META_PATH,
+    bundle_dir: Path = BUNDLE_DIR,
+) -> str:
+    """Cheap fingerprint of the on-disk index; changes whenever it is rewritten or its delta grows."""
+    paths = [bundle_dir / MANIFEST_NAME, bundle_dir / DELTA_DIRNAME / OPS_NAME]
+    if not paths[0].exists():
+        paths = [faiss_path, meta_path]
+    parts = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            parts.append("missing")
+            continue
+        parts.append(f"{st.st_mtime_ns:x}.{st.st_size:x}")
+    return "-".join(parts)
+
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the FAISS + BM25 index")
+    parser.add_argument(
+        "--no_embedding_cache",
+        action="store_true",
+        help="Re-encode every document instead of reusing cached embeddings",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold live upserts/removals into the existing bundle instead of rebuilding",
+    )
+    parser.add_argument(
+        "--assessments",
+        default=str(ASSESSMENTS_PATH),
+        help="Assessments to index: the crawler's JSON array, or JSONL with one record per line",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Stream the catalog and encode it across this many processes (for large catalogs)",
+    )
+    parser.add_argument(
+        "--window_size",
+        type=int,
+        default=8192,
+        help="With --workers: records read and encoded per step, which bounds memory",
+    )
+    parser.add_argument(
+        "--index_spec",
+        default=INDEX_SPEC,
+        help='FAISS index: "auto" (by catalog size), or e.g. "Flat", "HNSW32:efSearch=64", "IVF1024,Flat:nprobe=16"',
+    )
+    parser.add_argument(
+        "--compression",
+        default=INDEX_COMPRESSION,
+        help="Store vectors as fp16, sq8 (8-bit scalar quantization) or pq[M] (product quantization, M bytes)",
+    )
+    parser.add_argument(
+        "--pca_dim",
+        type=int,
+        default=INDEX_PCA_DIM,
+        help="Project vectors and queries to this many dimensions with PCA (0 = off)",
+    )
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-    build_index()
-    print("\n FAISS index built successfully.")
+    if args.compact:
+        manifest = compact_index()
+        print(f"\n Index bundle compacted: version {manifest['version']}, {manifest['count']} vectors")
+    elif args.workers > 0:
+        from embeddings.parallel_builder import build_index_parallel
+        stats = build_index_parallel(
+            Path(args.assessments),
+            workers=args.workers,
+            window_size=args.window_size,
+            use_embedding_cache=not args.no_embedding_cache,
+            index_spec=args.index_spec,
+            compression=args.compression,
+            pca_dim=args.pca_dim,
+        )
+        print(
+            f"\n Index bundle built at {BUNDLE_DIR}: {stats['documents']} docs, "
+            f"{stats['docs_per_sec']} docs/s, peak RSS {stats['peak_rss_mb']} MB "
+            f"(largest worker {stats['peak_worker_rss_mb']} MB)"
+        )
+    else:
+        build_index(
+            Path(args.assessments),
+            use_embedding_cache=not args.no_embedding_cache,
+            index_spec=args.index_spec,
+            compression=args.compression,
+            pca_dim=args.pca_dim,
+        )
+        print(f"\n Index bundle built successfully at {BUNDLE_DIR}")
@@ -0,0 +1,222 @@
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# "auto" picks a spec from the catalog size (see auto_spec)
+INDEX_SPEC = os.getenv("SHL_INDEX_SPEC", "auto")
+# Overrides the bundle's search knobs at load time, e.g. "nprobe=32" or "efSearch=128"
+INDEX_SEARCH_PARAMS = os.getenv("SHL_INDEX_SEARCH_PARAMS", "")
+# Vector storage: "" (float32), "fp16", "sq8" or "pq[M]" (M bytes per vector, default dim/8)
+INDEX_COMPRESSION = os.getenv("SHL_INDEX_COMPRESSION", "")
+# Project vectors (and queries) to this many dimensions with PCA first; 0 = off
+INDEX_PCA_DIM = int(os.getenv("SHL_INDEX_PCA_DIM", "0"))
+
+EXACT_SEARCH_MAX = 20_000  # below this, exact search is ~1 ms per query
+HNSW_MAX = 1_000_000  # above this, HNSW's graph memory and build time favour IVF
+TRAIN_SAMPLE = 256 * 1024  # vectors used to train IVF centroids
+ADD_CHUNK = 65536
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """
+    A FAISS index_factory description plus its search-time knobs, written
+    as "<factory>[:<knobs>]", e.g. "Flat", "IVF1024,Flat:nprobe=16" or
+    "HNSW32:efSearch=64". Knobs use faiss.ParameterSpace syntax.
+    """
+    factory: str = "Flat"
+    search: str = ""
+
+    @classmethod
+    def parse(cls, text: str) -> "IndexSpec":
+        factory, _, search = text.strip().partition(":")
+        if not factory:
+            raise ValueError(f"Empty index spec '{text}'.")
+        return cls(factory=factory.strip(), search=search.strip())
+
+    def __str__(self) -> str:
+        return f"{self.factory}:{self.search}" if self.search else self.factory
+
+    @property
+    def kind(self) -> str:
+        factory = self.factory.upper()
+        if "HNSW" in factory:
+            return "hnsw"
+        if "IVF" in factory:
+            return "ivf"
+        return "flat"
+
+    def with_search(self, search: str) -> "IndexSpec":
+        return IndexSpec(self.factory, search)
+
+
+def ivf_nlist(n: int) -> int:
+    """Power-of-two list count near 4·sqrt(n), the usual IVF starting point."""
+    return max(1, 2 ** round(math.log2(max(4 * math.sqrt(n), 1))))
+
+
+def auto_spec(n: int) -> IndexSpec:
+    """Exact search for small catalogs, HNSW up to ~1M vectors, IVF beyond."""
+    if n <= EXACT_SEARCH_MAX:
+        return IndexSpec("Flat")
+    if n <= HNSW_MAX:
+        return IndexSpec("HNSW32", "efSearch=64")
+    nlist = ivf_nlist(n)
+    return IndexSpec(f"IVF{nlist},Flat", f"nprobe={max(8, nlist // 256)}")
+
+
+def compressed_spec(spec: IndexSpec, compression: str, dim: int, pca_dim: int = 0) -> IndexSpec:
+    """
+    `spec` with its vectors stored as float16 ("fp16"), 8-bit scalar
+    quantized ("sq8") or product quantized ("pq[M]") instead of float32,
+    optionally after a PCA projection to `pca_dim` dimensions.
+    """
+    factory = spec.factory
+    if compression:
+        match = re.fullmatch(r"(fp16|sq8|pq)(\d*)", compression.lower())
+        if match is None or (match.group(2) and match.group(1) != "pq"):
+            raise ValueError(f"Unknown compression '{compression}'; expected fp16, sq8 or pq[M].")
+        codec = {
+            "fp16": "SQfp16",
+            "sq8": "SQ8",
+            "pq": f"PQ{match.group(2) or (pca_dim or dim) // 8}",
+        }[match.group(1)]
+        parts = factory.split(",")
+        if parts == ["Flat"] and codec.startswith("PQ"):
+            # A plain IndexPQ rejects search parameters, so it can't take the
+            # duration filter's IDSelector; one IVF list scans the same codes
+            parts = ["IVF1", codec]
+        elif parts[-1] == "Flat":
+            parts[-1] = codec
+        elif spec.kind == "hnsw" and len(parts) == 1:
+            parts.append(codec)
+        else:
+            raise ValueError(f"Index spec '{spec}' already sets its own vector storage.")
+        factory = ",".join(parts)
+    if pca_dim:
+        factory = f"PCA{pca_dim},{factory}"
+    return IndexSpec(factory, spec.search)
+
+
+def resolve_spec(
+    spec: Optional[str],
+    n: int,
+    dim: int,
+    compression: str = INDEX_COMPRESSION,
+    pca_dim: int = INDEX_PCA_DIM,
+) -> IndexSpec:
+    if not spec or spec == "auto":
+        resolved = auto_spec(n)
+        logger.info("Index spec for %d vectors: %s (auto)", n, resolved)
+    else:
+        resolved = IndexSpec.parse(spec)
+    if compression or pca_dim:
+        resolved = compressed_spec(resolved, compression, dim, pca_dim)
+        logger.info("Compressed index spec: %s", resolved)
+    return resolved
+
+
+def set_search_params(index: faiss.Index, search: str) -> None:
+    """Apply knobs such as "nprobe=16" to `index` in place."""
+    if search:
+        faiss.ParameterSpace().set_index_parameters(index, search)
+
+
+def _train(index: faiss.Index, sample: np.ndarray) -> None:
+    if not isinstance(index, faiss.IndexPreTransform):
+        index.train(sample)
+        return
+    for i in range(index.chain.size()):
+        transform = faiss.downcast_VectorTransform(index.chain.at(i))
+        transform.train(sample)
+        if isinstance(transform, faiss.PCAMatrix):
+            # FAISS centres on the training mean, which shifts every inner
+            # product by a per-document <mean, x> term; a plain projection
+            # keeps scores (and rankings) close to the full vectors
+            faiss.copy_array_to_vector(np.zeros(transform.d_out, dtype=np.float32), transform.b)
+        sample = transform.apply(sample)
+    index.index.train(sample)
+    index.is_trained = True
+
+
+def build_faiss_index(spec: IndexSpec, vectors: np.ndarray) -> faiss.Index:
+    """
+    Inner-product index for `spec` over `vectors` (an array or memmap; it is
+    read in chunks). Trainable indexes are trained on a random sample.
+    """
+    n, dim = vectors.shape
+    index = faiss.index_factory(dim, spec.factory, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        sample = vectors
+        if n > TRAIN_SAMPLE:
+            rows = np.sort(np.random.default_rng(0).choice(n, TRAIN_SAMPLE, replace=False))
+            sample = vectors[rows]
+        logger.info("Training %s on %d vectors", spec.factory, len(sample))
+        _train(index, np.ascontiguousarray(sample, dtype=np.float32))
+    _add(index, vectors)
+    set_search_params(index, spec.search)
+    return index
+
+
+def _add(index: faiss.Index, vectors: np.ndarray) -> None:
+    for start in range(0, len(vectors), ADD_CHUNK):
+        index.add(np.ascontiguousarray(vectors[start:start + ADD_CHUNK], dtype=np.float32))
+
+
+def rebuild_like(index: faiss.Index, vectors: np.ndarray) -> faiss.Index:
+    """
+    Empty copy of `index` that keeps what it learned in training (PCA
+    projection, IVF centroids, quantizer codebooks), refilled with `vectors`.
+    Compressed vectors decoded from `index` re-encode to the same codes, so
+    compaction doesn't compound quantization error by retraining on them.
+    `index` must not be memory-mapped if it is an IVF index.
+    """
+    rebuilt = faiss.clone_index(index)
+    rebuilt.reset()
+    _add(rebuilt, vectors)
+    return rebuilt
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """All stored vectors, in row order (decoded, for compressed indexes)."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def to_search_space(index: faiss.Index, vectors: np.ndarray) -> np.ndarray:
+    """`vectors` as `index` compares them: through its PCA projection, if any."""
+    if isinstance(index, faiss.IndexPreTransform):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        for i in range(index.chain.size()):
+            vectors = index.chain.at(i).apply(vectors)
+    return vectors
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Search parameters restricting `index` to `selector`, typed for the index
+    so its current nprobe / efSearch still apply.
+    """
+    if isinstance(index, faiss.IndexPreTransform):
+        inner = search_parameters(faiss.downcast_index(index.index), selector)
+        params = faiss.SearchParametersPreTransform(index_params=inner)
+        params.referenced_objects = [inner]
+        return params
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    if isinstance(index, faiss.IndexPQ):
+        raise ValueError("IndexPQ can't search with a selector; rebuild it as IVF1,PQ<M> (compression=pq does).")
+    return faiss.SearchParameters(sel=selector)
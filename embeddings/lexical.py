@@ -0,0 +1,200 @@
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keeps tech tokens like "c++", "c#" and "node.js" intact
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our the this to "
+    "we who will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    BM25 over the index documents, precomputed into a sparse term × document
+    matrix of per-term BM25 contributions.
+
+    Scoring a query is a sum of the matrix rows for its terms, so a batch of
+    queries is one sparse product (queries × terms) @ (terms × docs). Cost is
+    proportional to the postings touched, not to catalog size.
+    """
+
+    def __init__(self, weights: sparse.csr_matrix, vocab: list[str]):
+        self.weights = weights
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+
+    @property
+    def n_docs(self) -> int:
+        return self.weights.shape[1]
+
+    @classmethod
+    def build(
+        cls,
+        documents: list[str],
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> "LexicalIndex":
+        builder = LexicalIndexBuilder()
+        builder.add(documents)
+        return builder.build(k1, b)
+
+    @classmethod
+    def from_counts(
+        cls,
+        tf_matrix: sparse.csr_matrix,
+        doc_lens: np.ndarray,
+        vocab: list[str],
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> "LexicalIndex":
+        """BM25 weights from a term × document matrix of raw term counts."""
+        n_terms, n_docs = tf_matrix.shape
+
+        # BM25 term weight per (term, doc), with the idf folded in
+        df = np.diff(tf_matrix.indptr).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_lens.mean()) if n_docs else 0.0
+        norm = k1 * (1 - b + b * doc_lens / max(avg_len, 1e-9))
+
+        tf_vals = tf_matrix.data
+        doc_of = tf_matrix.indices
+        term_of = np.repeat(np.arange(n_terms), np.diff(tf_matrix.indptr))
+        tf_matrix.data = (idf[term_of] * tf_vals * (k1 + 1) / (tf_vals + norm[doc_of])).astype(np.float32)
+
+        logger.info("Lexical index built: %d terms × %d docs, %d postings", n_terms, n_docs, tf_matrix.nnz)
+        return cls(tf_matrix, vocab)
+
+    def save(self, matrix_path: Path, vocab_path: Path) -> None:
+        sparse.save_npz(matrix_path, self.weights, compressed=True)
+        with open(vocab_path, "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, matrix_path: Path, vocab_path: Path) -> "LexicalIndex":
+        weights = sparse.load_npz(matrix_path).tocsr()
+        with open(vocab_path, "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        return cls(weights.astype(np.float32), vocab)
+
+    def _query_matrix(self, queries: list[str]) -> sparse.csr_matrix:
+        rows, cols = [], []
+        for qi, query in enumerate(queries):
+            ids = {self.term_ids[t] for t in tokenize(query) if t in self.term_ids}
+            rows.extend([qi] * len(ids))
+            cols.extend(ids)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(queries), len(self.vocab)),
+        )
+
+    def search(
+        self,
+        queries: list[str],
+        k: int,
+        eligible: Optional[list[Optional[np.ndarray]]] = None,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-k BM25 (rows, scores) per query, best first. `eligible` optionally
+        gives a boolean row mask per query; ineligible rows are never returned.
+        """
+        scores = (self._query_matrix(queries) @ self.weights).tocsr()
+        results = []
+        for qi in range(len(queries)):
+            start, end = scores.indptr[qi], scores.indptr[qi + 1]
+            rows, vals = scores.indices[start:end], scores.data[start:end]
+            mask = eligible[qi] if eligible is not None else None
+            if mask is not None:
+                keep = mask[rows]
+                rows, vals = rows[keep], vals[keep]
+            if len(rows) > k:
+                top = np.argpartition(-vals, k - 1)[:k]
+                rows, vals = rows[top], vals[top]
+            order = np.lexsort((rows, -vals))
+            results.append((rows[order].astype(np.int64), vals[order]))
+        return results
+
+
+class LexicalIndexBuilder:
+    """
+    Accumulates term counts document by document, so a BM25 index can be
+    built from a stream without keeping the document texts around.
+    """
+
+    def __init__(self):
+        self.term_ids: dict[str, int] = {}
+        self._rows: list[np.ndarray] = []
+        self._cols: list[np.ndarray] = []
+        self._counts: list[np.ndarray] = []
+        self._doc_lens: list[int] = []
+
+    @property
+    def n_docs(self) -> int:
+        return len(self._doc_lens)
+
+    def add(self, documents: list[str]) -> None:
+        term_ids = self.term_ids
+        rows, cols, counts = [], [], []
+        for doc_id, doc in enumerate(documents, start=self.n_docs):
+            tokens = tokenize(doc)
+            self._doc_lens.append(len(tokens))
+            tf: dict[int, int] = {}
+            for tok in tokens:
+                tid = term_ids.setdefault(tok, len(term_ids))
+                tf[tid] = tf.get(tid, 0) + 1
+            rows.extend(tf.keys())
+            cols.extend([doc_id] * len(tf))
+            counts.extend(tf.values())
+        self._rows.append(np.asarray(rows, dtype=np.int32))
+        self._cols.append(np.asarray(cols, dtype=np.int32))
+        self._counts.append(np.asarray(counts, dtype=np.float32))
+
+    def build(self, k1: float = BM25_K1, b: float = BM25_B) -> LexicalIndex:
+        tf_matrix = sparse.csr_matrix(
+            (
+                np.concatenate(self._counts) if self._counts else np.empty(0, dtype=np.float32),
+                (
+                    np.concatenate(self._rows) if self._rows else np.empty(0, dtype=np.int32),
+                    np.concatenate(self._cols) if self._cols else np.empty(0, dtype=np.int32),
+                ),
+            ),
+            shape=(len(self.term_ids), self.n_docs),
+        )
+        vocab = [None] * len(self.term_ids)
+        for term, tid in self.term_ids.items():
+            vocab[tid] = term
+        doc_lens = np.asarray(self._doc_lens, dtype=np.float32)
+        return LexicalIndex.from_counts(tf_matrix, doc_lens, vocab, k1, b)
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: list[np.ndarray],
+    k: int = 60,
+    weights: Optional[list[float]] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fuse ranked row lists by RRF; returns (rows, fused scores), best first."""
+    weights = weights or [1.0] * len(ranked_lists)
+    fused: dict[int, float] = {}
+    for rows, weight in zip(ranked_lists, weights):
+        for rank, row in enumerate(rows.tolist()):
+            fused[row] = fused.get(row, 0.0) + weight / (k + rank + 1)
+    # Stable on ties: dict preserves first-seen (dense-first) order
+    ordered = sorted(fused.items(), key=lambda kv: -kv[1])
+    rows = np.fromiter((r for r, _ in ordered), dtype=np.int64, count=len(ordered))
+    scores = np.fromiter((s for _, s in ordered), dtype=np.float32, count=len(ordered))
+    return rows, scores
@@ -0,0 +1,315 @@
+import hashlib
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from crawler.test_types import TEST_TYPE_MAP
+
+# One bit per catalog test type label, in TEST_TYPE_MAP order
+TEST_TYPE_BITS: dict[str, int] = {
+    label: 1 << i for i, label in enumerate(TEST_TYPE_MAP.values())
+}
+
+
+def type_bit(label: str) -> int:
+    """Bitmask for a test type label (0 if the label is not in TEST_TYPE_MAP)."""
+    return TEST_TYPE_BITS.get(label, 0)
+
+
+def assessment_id(url: str) -> int:
+    """Stable 63-bit id of an assessment, derived from its catalog URL."""
+    digest = hashlib.sha256(url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def _type_mask(test_types: Iterable[str]) -> int:
+    # Substring semantics match the original `domain in t` bucketing test
+    mask = 0
+    for label, bit in TEST_TYPE_BITS.items():
+        if any(label in t for t in test_types):
+            mask |= bit
+    return mask
+
+
+# Separator for list-valued columns (test types) inside a string table
+_LIST_SEP = "\x1f"
+
+
+class StringTable:
+    """
+    Read-only string column backed by a memory-mapped UTF-8 blob and an
+    offsets array; strings are decoded only when indexed.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, is_list: bool = False):
+        self.offsets = offsets
+        self.blob = blob
+        self.is_list = is_list
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, row: int):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        value = self.blob[start:end].tobytes().decode("utf-8")
+        if self.is_list:
+            return tuple(value.split(_LIST_SEP)) if value else ()
+        return value
+
+    @staticmethod
+    def paths(prefix: Path) -> tuple[Path, Path]:
+        return prefix.with_suffix(".offsets.npy"), prefix.with_suffix(".blob")
+
+    @classmethod
+    def load(cls, prefix: Path, is_list: bool = False) -> "StringTable":
+        offsets_path, blob_path = cls.paths(prefix)
+        offsets = np.load(offsets_path, mmap_mode="r")
+        if blob_path.stat().st_size:
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            blob = np.empty(0, dtype=np.uint8)
+        return cls(offsets, blob, is_list=is_list)
+
+
+class StringTableWriter:
+    """Appends strings to a string table on disk without holding them in memory."""
+
+    def __init__(self, prefix: Path, is_list: bool = False):
+        self.offsets_path, blob_path = StringTable.paths(prefix)
+        self.is_list = is_list
+        self._blob = open(blob_path, "wb")
+        self._offsets = [0]
+
+    def append(self, value) -> None:
+        if self.is_list:
+            value = _LIST_SEP.join(value or ())
+        data = (value or "").encode("utf-8")
+        self._blob.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self) -> None:
+        self._blob.close()
+        np.save(self.offsets_path, np.asarray(self._offsets, dtype=np.int64))
+
+
+class _ChainedColumn:
+    """A base column followed by a short list of appended values."""
+
+    def __init__(self, base, extra: Sequence):
+        self.base = base
+        self.extra = extra
+        self._n_base = len(base)
+
+    def __len__(self) -> int:
+        return self._n_base + len(self.extra)
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.extra
+
+    def __getitem__(self, row: int):
+        return self.base[row] if row < self._n_base else self.extra[row - self._n_base]
+
+
+class MetadataStore:
+    """
+    Columnar, array-backed metadata aligned with FAISS index rows.
+
+    Filtering and domain bucketing operate on NumPy columns indexed by
+    candidate row arrays; `record()` materializes the familiar metadata dict
+    only for rows that end up in a response.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        urls: Sequence[str],
+        descriptions: Sequence[str],
+        durations: np.ndarray,
+        duration_missing: np.ndarray,
+        remote_support: Sequence[str],
+        adaptive_support: Sequence[str],
+        test_types: Sequence[tuple],
+        type_mask: Optional[np.ndarray] = None,
+        ids: Optional[np.ndarray] = None,
+    ):
+        self.names = names
+        self.urls = urls
+        self.descriptions = descriptions
+        self.durations = durations
+        self.duration_missing = duration_missing
+        self.remote_support = remote_support
+        self.adaptive_support = adaptive_support
+        self.test_types = test_types
+
+        # Derived columns (precomputed when loaded from a bundle)
+        if type_mask is None:
+            type_mask = np.fromiter(
+                (_type_mask(t) for t in test_types), dtype=np.uint16, count=len(test_types)
+            )
+        if ids is None:
+            ids = np.fromiter((assessment_id(u) for u in urls), dtype=np.int64, count=len(urls))
+        self.type_mask = type_mask
+        self.ids = ids  # stable per-URL id; also the dedup key when reranking
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "MetadataStore":
+        n = len(records)
+        interned_types: dict[tuple, tuple] = {}
+
+        def column(key: str, default: str) -> np.ndarray:
+            col = np.empty(n, dtype=object)
+            col[:] = [sys.intern(str(r.get(key) or default)) for r in records]
+            return col
+
+        durations = np.zeros(n, dtype=np.int32)
+        duration_missing = np.ones(n, dtype=bool)
+        test_types = np.empty(n, dtype=object)
+        for i, r in enumerate(records):
+            if r.get("duration") is not None:
+                durations[i] = int(r["duration"])
+                duration_missing[i] = False
+            types = tuple(r.get("test_types") or ())
+            test_types[i] = interned_types.setdefault(types, types)
+
+        descriptions = np.empty(n, dtype=object)
+        descriptions[:] = [r.get("description", "") for r in records]
+
+        return cls(
+            names=column("name", ""),
+            urls=column("url", ""),
+            descriptions=descriptions,
+            durations=durations,
+            duration_missing=duration_missing,
+            remote_support=column("remote_support", "No"),
+            adaptive_support=column("adaptive_support", "No"),
+            test_types=test_types,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, row: int) -> dict:
+        return self.record(row)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self.record(i) for i in range(len(self)))
+
+    def record(self, row: int) -> dict:
+        return {
+            "name": self.names[row],
+            "url": self.urls[row],
+            "description": self.descriptions[row],
+            "duration": None if self.duration_missing[row] else int(self.durations[row]),
+            "remote_support": self.remote_support[row],
+            "adaptive_support": self.adaptive_support[row],
+            "test_types": list(self.test_types[row]),
+        }
+
+    def to_records(self) -> list[dict]:
+        return list(self)
+
+    def append(self, records: list[dict]) -> "MetadataStore":
+        """
+        A new store with `records` after this store's rows. This store is
+        untouched; numeric columns are copied, string columns are chained.
+        """
+        extra = MetadataStore.from_records(records)
+        chained = {
+            col: _ChainedColumn(getattr(self, col), getattr(extra, col))
+            for col in self._STRING_COLUMNS + ("test_types",)
+        }
+        concatenated = {
+            col: np.concatenate([getattr(self, col), getattr(extra, col)])
+            for col in self._ARRAY_COLUMNS
+        }
+        return MetadataStore(**chained, **concatenated)
+
+    # On-disk layout: one .npy per numeric column, one string table per text column
+    _ARRAY_COLUMNS = ("durations", "duration_missing", "type_mask", "ids")
+    _STRING_COLUMNS = ("names", "urls", "descriptions", "remote_support", "adaptive_support")
+
+    def save(self, directory: Path) -> list[Path]:
+        """Write the columns under `directory`; returns the files written."""
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for col in self._ARRAY_COLUMNS:
+            path = directory / f"{col}.npy"
+            np.save(path, np.asarray(getattr(self, col)))
+            written.append(path)
+        for col, is_list in [(c, False) for c in self._STRING_COLUMNS] + [("test_types", True)]:
+            writer = StringTableWriter(directory / col, is_list=is_list)
+            for value in getattr(self, col):
+                writer.append(value)
+            writer.close()
+            written.extend(StringTable.paths(directory / col))
+        return written
+
+    @classmethod
+    def load(cls, directory: Path) -> "MetadataStore":
+        """Memory-map a store written by `save()`; nothing is parsed up front."""
+        arrays = {c: np.load(directory / f"{c}.npy", mmap_mode="r") for c in cls._ARRAY_COLUMNS}
+        strings = {c: StringTable.load(directory / c) for c in cls._STRING_COLUMNS}
+        return cls(
+            test_types=StringTable.load(directory / "test_types", is_list=True),
+            **strings,
+            **arrays,
+        )
+
+    def duration_ok(self, rows: np.ndarray, max_duration: Optional[int]) -> np.ndarray:
+        """Mask over `rows`: duration unknown or within `max_duration` minutes."""
+        if max_duration is None:
+            return np.ones(len(rows), dtype=bool)
+        return self.duration_missing[rows] | (self.durations[rows] <= max_duration)
+
+    def has_type(self, rows: np.ndarray, label: str) -> np.ndarray:
+        """Mask over `rows`: row carries the given test type label."""
+        return (self.type_mask[rows] & type_bit(label)) != 0
+
+
+class MetadataWriter:
+    """
+    Writes a MetadataStore to `directory` in batches (same layout as
+    `MetadataStore.save()`), so building metadata for a large catalog never
+    holds more than one batch of records. Load the result with
+    `MetadataStore.load()`.
+    """
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.dir = directory
+        self._arrays: dict[str, list[np.ndarray]] = {c: [] for c in MetadataStore._ARRAY_COLUMNS}
+        self._strings = {
+            col: StringTableWriter(directory / col, is_list=is_list)
+            for col, is_list in [(c, False) for c in MetadataStore._STRING_COLUMNS] + [("test_types", True)]
+        }
+        self.rows = 0
+
+    def append(self, records: list[dict]) -> None:
+        batch = MetadataStore.from_records(records)
+        for col, chunks in self._arrays.items():
+            chunks.append(np.asarray(getattr(batch, col)))
+        for col, writer in self._strings.items():
+            for value in getattr(batch, col):
+                writer.append(value)
+        self.rows += len(records)
+
+    def close(self) -> list[Path]:
+        """Finish the columns; returns the files written."""
+        written = []
+        for col, chunks in self._arrays.items():
+            if not chunks:
+                chunks = [np.asarray(getattr(MetadataStore.from_records([]), col))]
+            path = self.dir / f"{col}.npy"
+            np.save(path, np.concatenate(chunks))
+            written.append(path)
+        for col, writer in self._strings.items():
+            writer.close()
+            written.extend(StringTable.paths(self.dir / col))
+        return written
+
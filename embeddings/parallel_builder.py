@@ -0,0 +1,252 @@
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from embeddings.bundle import BUNDLE_DIR, write_bundle
+from embeddings.embedding_cache import EMBEDDING_CACHE_DIR, EmbeddingCache
+from embeddings.encoders import DEFAULT_ENCODER_BACKEND, MODEL_NAME, encoder_name, get_encoder
+from embeddings.index_builder import ASSESSMENTS_PATH, _build_document, _metadata_record
+from embeddings.index_spec import INDEX_COMPRESSION, INDEX_PCA_DIM, INDEX_SPEC, build_faiss_index, resolve_spec
+from embeddings.lexical import LexicalIndexBuilder
+from embeddings.metadata_store import MetadataStore, MetadataWriter
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SIZE = 8192  # records read, length-sorted and encoded together
+ENCODE_BATCH_SIZE = 64  # documents per encoder call in a worker
+READ_CHUNK = 1 << 20  # bytes read at a time when streaming a JSON array
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """
+    Stream assessment records from disk: one per line for `.jsonl`, or the
+    elements of a top-level JSON array (the crawler's format), decoded one
+    at a time without loading the file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buf = f.read(READ_CHUNK).lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{path} is not a JSON array of assessments.")
+        pos = 1
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                buf, pos = f.read(READ_CHUNK), 0
+                if not buf:
+                    raise ValueError(f"{path} ends before its JSON array is closed.")
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                more = f.read(READ_CHUNK)
+                if not more:
+                    raise
+                # The element continues past the buffer
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield record
+            pos = end
+
+
+def _iter_windows(records: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    window = []
+    for record in records:
+        window.append(record)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+# Per-process encoder, created once by the pool initializer
+_worker_encoder = None
+
+
+def _init_worker(model_name: str, encoder_backend: str, threads: int) -> None:
+    global _worker_encoder
+    _worker_encoder = get_encoder(model_name, encoder_backend, threads=threads)
+
+
+def _encode_in_worker(texts: list[str]) -> np.ndarray:
+    return _worker_encoder.encode(texts, batch_size=len(texts))
+
+
+class ParallelEncoder:
+    """
+    Encodes documents across a pool of worker processes, each with its own
+    encoder. Documents are sorted by length and cut into batches of similar
+    length, so little compute goes to padding; results come back in input
+    order. The pool is only started once something needs encoding.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        encoder_backend: str,
+        workers: int,
+        batch_size: int = ENCODE_BATCH_SIZE,
+    ):
+        self.model_name = model_name
+        self.encoder_backend = encoder_backend
+        self.workers = workers
+        self.batch_size = batch_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            logger.info(
+                "Starting %d encoder processes (%s %s, %d threads each)",
+                self.workers, self.encoder_backend, self.model_name, threads,
+            )
+            # spawn: workers must not inherit a forked copy of torch/ONNX thread pools
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.encoder_backend, threads),
+            )
+        return self._pool
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        # Character length is a cheap, close proxy for token length
+        order = np.argsort(np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts)), kind="stable")
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        results = self._get_pool().map(_encode_in_worker, [[texts[j] for j in b] for b in batches])
+
+        out = None
+        for rows, vectors in zip(batches, results):
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[rows] = vectors
+        return out
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux; for RUSAGE_CHILDREN it is the largest waited-for child
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def build_index_parallel(
+    assessments_path: Path = ASSESSMENTS_PATH,
+    model_name: str = MODEL_NAME,
+    encoder_backend: str = DEFAULT_ENCODER_BACKEND,
+    workers: int = 2,
+    window_size: int = WINDOW_SIZE,
+    batch_size: int = ENCODE_BATCH_SIZE,
+    use_embedding_cache: bool = True,
+    embedding_cache_dir: Path = EMBEDDING_CACHE_DIR,
+    bundle_dir: Path = BUNDLE_DIR,
+    index_spec: Optional[str] = INDEX_SPEC,
+    compression: str = INDEX_COMPRESSION,
+    pca_dim: int = INDEX_PCA_DIM,
+) -> dict:
+    """
+    Out-of-core equivalent of `build_index` for large catalogs (JSON array or
+    JSONL). Records are streamed in windows of `window_size`; each window is
+    encoded across `workers` processes, and its vectors, metadata columns and
+    BM25 term counts are appended to disk or compact accumulators before the
+    next window is read. Memory outside the final FAISS index is bounded by
+    the window, not the catalog. Returns build stats.
+    """
+    started = time.perf_counter()
+    work_dir = bundle_dir.with_name(f"{bundle_dir.name}.build-{os.getpid()}")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True)
+    vectors_path = work_dir / "vectors.f32"
+
+    encoder = ParallelEncoder(model_name, encoder_backend, workers, batch_size)
+    cache = EmbeddingCache(encoder_name(model_name, encoder_backend), embedding_cache_dir) if use_embedding_cache else None
+    meta_writer = MetadataWriter(work_dir / "meta")
+    lexical = LexicalIndexBuilder()
+    dim = None
+    encode_seconds = 0.0
+
+    try:
+        with open(vectors_path, "wb") as vectors_file:
+            for window in _iter_windows(iter_records(assessments_path), window_size):
+                documents = [_build_document(a) for a in window]
+                t0 = time.perf_counter()
+                if cache is not None:
+                    embeddings = cache.encode(documents, encoder.encode)
+                else:
+                    embeddings = encoder.encode(documents)
+                encode_seconds += time.perf_counter() - t0
+                dim = embeddings.shape[1]
+                vectors_file.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+
+                meta_writer.append([_metadata_record(a) for a in window])
+                lexical.add(documents)
+                logger.info(
+                    "Indexed %d documents (%.0f docs/s)",
+                    meta_writer.rows, meta_writer.rows / (time.perf_counter() - started),
+                )
+    finally:
+        encoder.close()
+    meta_writer.close()
+    if dim is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise ValueError(f"No assessments found in {assessments_path}.")
+
+    # FAISS index from the vectors on disk, trained on a sample and added in chunks
+    n_docs = meta_writer.rows
+    spec = resolve_spec(index_spec, n_docs, dim, compression, pca_dim)
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(n_docs, dim))
+    index = build_faiss_index(spec, vectors)
+    del vectors
+
+    manifest = write_bundle(
+        index,
+        MetadataStore.load(work_dir / "meta"),
+        lexical.build(),
+        model_name=model_name,
+        encoder=encoder_name(model_name, encoder_backend),
+        bundle_dir=bundle_dir,
+        extra={"index_spec": str(spec)},
+    )
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "documents": n_docs,
+        "workers": workers,
+        "index_spec": str(spec),
+        "seconds": round(elapsed, 2),
+        "encode_seconds": round(encode_seconds, 2),
+        "docs_per_sec": round(n_docs / elapsed, 1),
+        "peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+        "peak_worker_rss_mb": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        "version": manifest["version"],
+    }
+    if cache is not None:
+        stats.update(cache.stats())
+    logger.info(
+        "Parallel build: %d docs in %.1fs (%.1f docs/s), peak RSS %.0f MB (largest worker %.0f MB)",
+        n_docs, elapsed, stats["docs_per_sec"], stats["peak_rss_mb"], stats["peak_worker_rss_mb"],
+    )
+    return stats
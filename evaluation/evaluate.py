@@ -3,16 +3,30 @@
 import argparse
 import json
 import logging
+import shutil
+import tempfile
+import time
 from collections import defaultdict
 from pathlib import Path
+from typing import Optional
 
+import faiss
+import numpy as np
 import pandas as pd
 
+from embeddings.bundle import BUNDLE_DIR, load_bundle, write_bundle
+from embeddings.index_builder import _build_document
+from embeddings.index_spec import IndexSpec, build_faiss_index, compressed_spec, ivf_nlist, reconstruct_all
 from recommender.engine import SHLRecommender
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+NPROBE_SWEEP = (1, 2, 4, 8, 16, 32, 64)
+EF_SEARCH_SWEEP = (16, 32, 64, 128, 256)
+TUNE_SAMPLE_QUERIES = 500  # catalog vectors reused as extra queries for ANN recall
+FILTER_CHECK_QUERY = "Java developer who can also lead a team, completed in 30 minutes"
+
 
 def load_train_set(excel_path: str | Path) -> dict[str, list[str]]:
    
@@ -57,13 +71,23 @@ def mean_recall_at_k(
     
     per_query = {}
 
-    for query, relevant_urls in query_to_relevant.items():
-        try:
-            results = recommender.recommend(query, top_n=k)
-            predicted_urls = [r["url"] for r in results]
-        except Exception as exc:
-            logger.error("Recommendation failed for query '%s': %s", query[:60], exc)
-            predicted_urls = []
+    queries = list(query_to_relevant)
+    try:
+        batch_results = recommender.recommend_batch(queries, top_n=k)
+    except Exception as exc:
+        # Retry one query at a time so a bad query only zeroes its own recall
+        logger.error("Batch recommendation failed for %d queries (%s); retrying per query", len(queries), exc)
+        batch_results = []
+        for query in queries:
+            try:
+                batch_results.append(recommender.recommend(query, top_n=k))
+            except Exception as exc:
+                logger.error("Recommendation failed for query '%s': %s", query[:60], exc)
+                batch_results.append([])
+
+    for query, results in zip(queries, batch_results):
+        relevant_urls = query_to_relevant[query]
+        predicted_urls = [r["url"] for r in results]
 
         r_at_k = recall_at_k(predicted_urls, relevant_urls, k)
         per_query[query] = r_at_k
@@ -119,6 +143,232 @@ def run_evaluation(excel_path: str | Path, k: int = 10) -> None:
     logger.info("Evaluation results saved to %s", results_path)
 
 
+def compare_hybrid(excel_path: str | Path, k: int = 10) -> dict:
+    """Mean Recall@k of dense-only vs hybrid (dense + BM25) retrieval, with per-query changes."""
+    query_to_relevant = load_train_set(excel_path)
+    report = {}
+    per_mode = {}
+    for mode, hybrid in (("dense", False), ("hybrid", True)):
+        recommender = SHLRecommender(hybrid=hybrid, embedding_cache=False)
+        if hybrid and recommender.lexical is None:
+            raise RuntimeError("No BM25 index in the bundle; rebuild it with python -m embeddings.index_builder")
+        report[f"{mode}_recall_at_{k}"], per_mode[mode] = mean_recall_at_k(recommender, query_to_relevant, k=k)
+    report["delta"] = report[f"hybrid_recall_at_{k}"] - report[f"dense_recall_at_{k}"]
+    report["per_query_delta"] = {
+        q[:80]: per_mode["hybrid"][q] - per_mode["dense"][q]
+        for q in query_to_relevant
+        if per_mode["hybrid"][q] != per_mode["dense"][q]
+    }
+
+    print("\n" + "=" * 60)
+    print(f"DENSE vs HYBRID — Mean Recall@{k}")
+    print("=" * 60)
+    for query, delta in report["per_query_delta"].items():
+        print(f"  [{delta:+.4f}] {query}")
+    print("-" * 60)
+    print(f"  Dense-only: {report[f'dense_recall_at_{k}']:.4f}")
+    print(f"  Hybrid:     {report[f'hybrid_recall_at_{k}']:.4f} ({report['delta']:+.4f})")
+    print("=" * 60)
+
+    results_path = Path(__file__).parent.parent / "data" / "hybrid_comparison.json"
+    with open(results_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Hybrid comparison saved to %s", results_path)
+    return report
+
+
+def compare_encoders(
+    excel_path: str | Path,
+    backends: list[str],
+    k: int = 10,
+) -> dict:
+    """
+    Parity of alternative encoder backends against the torch reference:
+    cosine drift on train queries + catalog documents, Mean Recall@k and
+    per-query encode latency.
+    """
+    query_to_relevant = load_train_set(excel_path)
+    queries = list(query_to_relevant)
+
+    def measure(backend: str) -> tuple[dict, np.ndarray]:
+        recommender = SHLRecommender(encoder_backend=backend, embedding_cache=False)
+        start = time.perf_counter()
+        for q in queries:
+            recommender.encoder.encode([q])
+        latency_ms = (time.perf_counter() - start) * 1000 / max(len(queries), 1)
+        mean_r, _ = mean_recall_at_k(recommender, query_to_relevant, k=k)
+        texts = queries + [_build_document(m) for m in recommender.meta]
+        vecs = recommender.encoder.encode(texts, batch_size=64)
+        return {f"mean_recall_at_{k}": mean_r, "encode_ms_per_query": latency_ms}, vecs
+
+    reference, ref_vecs = measure("torch")
+    report = {"torch": reference}
+    for backend in backends:
+        stats, vecs = measure(backend)
+        cosine = (ref_vecs * vecs).sum(axis=1)
+        stats["recall_delta"] = stats[f"mean_recall_at_{k}"] - reference[f"mean_recall_at_{k}"]
+        stats["cosine_mean"] = float(cosine.mean())
+        stats["cosine_min"] = float(cosine.min())
+        report[backend] = stats
+
+    print("\n" + "=" * 60)
+    print(f"ENCODER PARITY vs torch — Recall@{k}, cosine drift, latency")
+    print("=" * 60)
+    for backend, stats in report.items():
+        drift = (
+            f"cos mean {stats['cosine_mean']:.4f} / min {stats['cosine_min']:.4f} | "
+            f"ΔRecall {stats['recall_delta']:+.4f}"
+            if backend != "torch" else "reference"
+        )
+        print(
+            f"  {backend:<10} Recall@{k} {stats[f'mean_recall_at_{k}']:.4f} | "
+            f"{stats['encode_ms_per_query']:.1f} ms/query | {drift}"
+        )
+    print("=" * 60)
+
+    results_path = Path(__file__).parent.parent / "data" / "encoder_parity.json"
+    with open(results_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Encoder parity report saved to %s", results_path)
+    return report
+
+
+def _search_sweep(spec: IndexSpec, index) -> list[str]:
+    """Knob settings to try for `spec`: its own, if given, else a sweep."""
+    if spec.search or spec.kind == "flat":
+        return [spec.search]
+    if spec.kind == "ivf":
+        nlist = faiss.try_extract_index_ivf(index).nlist
+        return [f"nprobe={p}" for p in NPROBE_SWEEP if p <= nlist]
+    return [f"efSearch={ef}" for ef in EF_SEARCH_SWEEP]
+
+
+def _check_filtered_search(recommender: SHLRecommender, spec: IndexSpec) -> None:
+    """
+    Fail the sweep if a duration-filtered query errors on `spec`; through
+    mean_recall_at_k the failure would only show up as lower recall.
+    """
+    try:
+        results = recommender.recommend(FILTER_CHECK_QUERY)
+    except Exception as exc:
+        raise RuntimeError(f"Duration-filtered search fails on {spec}: {exc}") from exc
+    if not results:
+        raise RuntimeError(f"Duration-filtered search returned nothing on {spec}.")
+
+
+def tune_index(
+    excel_path: str | Path,
+    factories: Optional[list[str]] = None,
+    k: int = 10,
+    bundle_dir: Path = BUNDLE_DIR,
+    report_name: str = "index_tuning.json",
+) -> list[dict]:
+    """
+    Recall/latency/memory trade-off of FAISS index types over the current
+    bundle's vectors (no re-encoding). For each factory and search knob:
+    label Mean Recall@k on the Train-Set, ANN recall@k against exact search,
+    single-query FAISS latency, and index size (total, and per vector net
+    of trained state).
+    """
+    query_to_relevant = load_train_set(excel_path)
+    bundle = load_bundle(bundle_dir)
+    base = reconstruct_all(bundle.index)
+    n, dim = base.shape
+    if not factories:
+        factories = ["Flat", f"IVF{ivf_nlist(n)},Flat", "HNSW32"]
+
+    work_dir = Path(tempfile.mkdtemp(prefix="index-tuning-"))
+    recommender = None
+    rows = []
+    try:
+        for factory in factories:
+            spec = IndexSpec.parse(factory)
+            index = build_faiss_index(spec.with_search(""), base)
+            write_bundle(
+                index, bundle.meta, bundle.lexical,
+                model_name=bundle.manifest["model_name"],
+                encoder=bundle.manifest["encoder"],
+                bundle_dir=work_dir / "bundle",
+                extra={"index_spec": spec.factory},
+            )
+            if recommender is None:
+                recommender = SHLRecommender(bundle_dir=work_dir / "bundle", embedding_cache=False)
+                # Exact neighbours of train queries plus a sample of catalog vectors
+                sample = np.random.default_rng(0).choice(n, min(n, TUNE_SAMPLE_QUERIES), replace=False)
+                query_vecs = np.concatenate([
+                    recommender.encoder.encode(list(query_to_relevant)), base[sample],
+                ]).astype(np.float32)
+                exact = faiss.IndexFlatIP(dim)
+                exact.add(base)
+                _, truth = exact.search(query_vecs, k)
+            else:
+                recommender.reload(force=True)
+            size = faiss.serialize_index(index).nbytes
+            # Trained state (PCA matrix, codebooks, centroids) is a fixed cost;
+            # per-vector bytes are what grows with the catalog
+            empty = faiss.clone_index(index)
+            empty.reset()
+            fixed = faiss.serialize_index(empty).nbytes
+
+            for search in _search_sweep(spec, index):
+                recommender.set_search_params(search)
+                _check_filtered_search(recommender, spec.with_search(search))
+                live = recommender.index
+                _, found = live.search(query_vecs, k)
+                ann_recall = np.mean([
+                    len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)
+                ])
+                start = time.perf_counter()
+                for vec in query_vecs:
+                    live.search(vec[None, :], k)
+                latency_ms = (time.perf_counter() - start) * 1000 / len(query_vecs)
+                mean_r, _ = mean_recall_at_k(recommender, query_to_relevant, k=k)
+                rows.append({
+                    "spec": str(spec.with_search(search)),
+                    f"mean_recall_at_{k}": mean_r,
+                    f"ann_recall_at_{k}": float(ann_recall),
+                    "search_ms": latency_ms,
+                    "index_bytes": size,
+                    "fixed_bytes": fixed,
+                    "bytes_per_vector": (size - fixed) / n,
+                })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 78)
+    print(f"INDEX TUNING — {n} vectors, {len(query_vecs)} queries, Recall@{k}")
+    print("=" * 78)
+    print(f"  {'spec':<28}{'Recall':>8}{'ANN recall':>12}{'ms/query':>10}{'MB':>9}{'B/vec':>9}")
+    for row in rows:
+        print(
+            f"  {row['spec']:<28}{row[f'mean_recall_at_{k}']:>8.4f}{row[f'ann_recall_at_{k}']:>12.4f}"
+            f"{row['search_ms']:>10.3f}{row['index_bytes'] / 1e6:>9.1f}{row['bytes_per_vector']:>9.0f}"
+        )
+    print("=" * 78)
+
+    results_path = Path(__file__).parent.parent / "data" / report_name
+    with open(results_path, "w") as f:
+        json.dump({"vectors": n, "queries": len(query_vecs), "k": k, "results": rows}, f, indent=2)
+    logger.info("Index tuning report saved to %s", results_path)
+    return rows
+
+
+def compare_compression(
+    excel_path: str | Path,
+    k: int = 10,
+    bundle_dir: Path = BUNDLE_DIR,
+    pca_dim: int = 128,
+) -> list[dict]:
+    """
+    float32 vs fp16, SQ8, PQ and PCA-reduced storage of the bundle's vectors:
+    Recall@k, bytes per vector and search latency of each.
+    """
+    dim = load_bundle(bundle_dir).index.d
+    variants = [("", 0), ("fp16", 0), ("sq8", 0), ("pq", 0), ("", pca_dim), ("sq8", pca_dim)]
+    factories = [str(compressed_spec(IndexSpec("Flat"), c, dim, p)) for c, p in variants]
+    return tune_index(excel_path, factories, k=k, bundle_dir=bundle_dir, report_name="index_compression.json")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate SHL Recommender on Train-Set")
     parser.add_argument(
@@ -127,6 +377,42 @@ if __name__ == "__main__":
         help="Path to the Excel dataset file",
     )
     parser.add_argument("--k", type=int, default=10, help="Recall@K cutoff (default: 10)")
+    parser.add_argument(
+        "--compare_hybrid",
+        action="store_true",
+        help="Report Recall@K of dense-only vs hybrid (dense + BM25) retrieval",
+    )
+    parser.add_argument(
+        "--compare_encoders",
+        nargs="+",
+        metavar="BACKEND",
+        help="Report cosine drift and Recall@K of these encoder backends vs torch "
+             "(e.g. onnx onnx-int8)",
+    )
+    parser.add_argument(
+        "--tune_index",
+        nargs="*",
+        metavar="FACTORY",
+        help="Sweep FAISS index types and search knobs over the bundle's vectors, reporting "
+             "Recall@K, ANN recall, latency and size (default: Flat, IVF, HNSW32; "
+             'or e.g. "IVF256,Flat" "HNSW32:efSearch=64")',
+    )
+    parser.add_argument(
+        "--compare_compression",
+        action="store_true",
+        help="Report Recall@K, bytes per vector and latency of fp16, SQ8, PQ and PCA-reduced vectors",
+    )
+    parser.add_argument("--pca_dim", type=int, default=128, help="PCA dimensions for --compare_compression")
+    parser.add_argument("--bundle_dir", default=str(BUNDLE_DIR), help="Index bundle to tune over")
     args = parser.parse_args()
 
-    run_evaluation(args.excel_path, k=args.k)
+    if args.compare_compression:
+        compare_compression(args.excel_path, k=args.k, bundle_dir=Path(args.bundle_dir), pca_dim=args.pca_dim)
+    elif args.tune_index is not None:
+        tune_index(args.excel_path, args.tune_index, k=args.k, bundle_dir=Path(args.bundle_dir))
+    elif args.compare_hybrid:
+        compare_hybrid(args.excel_path, k=args.k)
+    elif args.compare_encoders:
+        compare_encoders(args.excel_path, args.compare_encoders, k=args.k)
+    else:
+        run_evaluation(args.excel_path, k=args.k)
@@ -0,0 +1,153 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Optional
+
+from recommender.engine import MAX_RESULTS, SHLRecommender
+from recommender.metrics import StageTimings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_MS = 5.0
+DEFAULT_MAX_BATCH_SIZE = 32
+
+
+@dataclass
+class _PendingRequest:
+    query: str
+    top_n: int
+    timings: Optional[StageTimings] = None
+    future: Future = field(default_factory=Future)
+    submitted: float = field(default_factory=time.perf_counter)
+
+
+class RecommendationBatcher:
+    """
+    Coalesces concurrent recommend() calls into batched encode + search passes.
+
+    The first request to arrive opens a collection window of `window_ms`;
+    every request submitted before the window closes (or until
+    `max_batch_size` is reached) is served by a single
+    `SHLRecommender.recommend_many` call, and each caller gets back exactly
+    what `recommend()` would have returned for its own query. If the batch
+    fails, its queries are retried one by one and only those that fail again
+    get the exception. A caller's
+    `timings` receive the batch's stage durations plus its own wait for the
+    batch to close ("coalesce").
+    """
+
+    def __init__(
+        self,
+        recommender: SHLRecommender,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.recommender = recommender
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[_PendingRequest | None]" = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._run, name="recommend-batcher", daemon=True
+        )
+        self._worker.start()
+        logger.info(
+            "RecommendationBatcher started (window=%.1f ms, max batch=%d)",
+            window_ms, max_batch_size,
+        )
+
+    def submit(
+        self,
+        query: str,
+        top_n: int = MAX_RESULTS,
+        timings: Optional[StageTimings] = None,
+    ) -> Future:
+        """Queue a query and return a future resolving to its recommendations."""
+        if self._closed:
+            raise RuntimeError("RecommendationBatcher is closed.")
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty.")
+        pending = _PendingRequest(query, top_n, timings)
+        self._queue.put(pending)
+        return pending.future
+
+    def recommend(
+        self,
+        query: str,
+        top_n: int = MAX_RESULTS,
+        timings: Optional[StageTimings] = None,
+    ) -> list[dict]:
+        """Blocking drop-in for `SHLRecommender.recommend`."""
+        return self.submit(query, top_n, timings).result()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: _PendingRequest) -> tuple[list[_PendingRequest], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[_PendingRequest]) -> None:
+        dispatched = time.perf_counter()
+        timings = StageTimings()
+        try:
+            results = self.recommender.recommend_many(
+                [(p.query, p.top_n) for p in batch], timings=timings
+            )
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0].future.set_exception(exc)
+                return
+            # Retry one query at a time so a bad query only fails its own request
+            logger.error("Batched recommendation failed (%d queries): %s; retrying per query", len(batch), exc)
+            for p in batch:
+                self._dispatch_one(p, dispatched)
+            return
+
+        logger.info("Served %d coalesced queries in one batch.", len(batch))
+        for p, result in zip(batch, results):
+            if p.timings is not None:
+                p.timings.add("coalesce", dispatched - p.submitted)
+                p.timings.update(timings)
+            p.future.set_result(result)
+
+    def _dispatch_one(self, p: _PendingRequest, dispatched: float) -> None:
+        timings = StageTimings()
+        try:
+            result = self.recommender.recommend(p.query, p.top_n, timings=timings)
+        except Exception as exc:
+            logger.error("Recommendation failed for query '%s': %s", p.query[:60], exc)
+            p.future.set_exception(exc)
+            return
+        if p.timings is not None:
+            p.timings.add("coalesce", dispatched - p.submitted)
+            p.timings.update(timings)
+        p.future.set_result(result)
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def canonicalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as a cache key."""
+    return " ".join(query.lower().split())
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a size bound and per-entry time-to-live.
+
+    Entries older than `ttl_seconds` are treated as misses and dropped on
+    access; once `max_size` entries are held the least recently used one is
+    evicted. A disabled cache (or `max_size` of 0) never stores anything.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+        enabled: bool = True,
+    ):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and self.max_size > 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ResponseCache(TTLCache):
+    """
+    Cache of serialized /recommend response bodies.
+
+    Keys are (canonical query, top_n) under a given index version. When a
+    lookup or store arrives with a different version than the one currently
+    held, every entry is dropped so stale recommendations are never served.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version: Optional[str] = None
+        self.invalidations = 0
+
+    def _sync_version(self, version: str) -> None:
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    if self.version is not None:
+                        self.invalidations += 1
+                    self._data.clear()
+                    self.version = version
+
+    def lookup(self, query: str, top_n: int, version: str) -> Optional[bytes]:
+        self._sync_version(version)
+        return self.get((canonicalize_query(query), top_n))
+
+    def store(self, query: str, top_n: int, version: str, body: bytes) -> None:
+        self._sync_version(version)
+        self.put((canonicalize_query(query), top_n), body)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["index_version"] = self.version
+        stats["invalidations"] = self.invalidations
+        return stats
@@ -2,14 +2,33 @@
 
 import logging
 import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Optional
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-from embeddings.index_builder import load_index, MODEL_NAME
+from embeddings.bundle import (
+    BUNDLE_DIR, DELTA_DIRNAME, MANIFEST_NAME, check_encoder_compatible, load_bundle,
+)
+from embeddings.delta import REMOVE, UPSERT, DeltaLog, DeltaLogSealed, DeltaOp, DeltaState
+from embeddings.encoders import DEFAULT_ENCODER_BACKEND, get_encoder
+from embeddings.index_builder import (
+    FAISS_INDEX_PATH, META_PATH, MODEL_NAME, _build_document, _metadata_record,
+    index_version, load_index, load_lexical_index,
+)
+from embeddings.index_spec import (
+    INDEX_SEARCH_PARAMS, IndexSpec, search_parameters, set_search_params, to_search_space,
+)
+from embeddings.lexical import LexicalIndex, reciprocal_rank_fusion
+from embeddings.metadata_store import MetadataStore, assessment_id
+from recommender.cache import TTLCache, canonicalize_query
+from recommender.metrics import (
+    BATCH_SIZE, EMBEDDING_LOOKUPS, FILTER_RELAXATIONS, POOL_SIZE, RECOMMEND_QUERIES, StageTimings,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +69,11 @@ DOMAIN_SIGNALS = {
 MIN_RESULTS = 5
 MAX_RESULTS = 10
 RETRIEVAL_MULTIPLIER = 4  # Retrieve 4x final count for reranking pool
+EMBEDDING_CACHE_SIZE = 1024  # Query vectors kept in memory (0 disables)
+EMBEDDING_CACHE_TTL = 3600.0  # Seconds before a cached query vector expires
+RRF_K = 60  # Reciprocal rank fusion damping constant
+LEXICAL_WEIGHT = 1.0  # BM25 ranking weight relative to dense in the fusion
+SEARCH_FILTER_CACHE_SIZE = 256  # Distinct duration limits with a prebuilt ID selector
 
 
 def _detect_domains(query: str) -> list[str]:
@@ -80,53 +104,154 @@ def _extract_duration_constraint(query: str) -> Optional[int]:
 
 
 def _balance_by_domain(
-    candidates: list[dict],
+    rows: np.ndarray,
+    meta: MetadataStore,
     detected_domains: list[str],
     n: int,
-) -> list[dict]:
+) -> list[int]:
     
     if not detected_domains or len(detected_domains) == 1:
-        return candidates[:n]
-
-    # Bucket candidates by their test types
-    buckets: dict[str, list[dict]] = {d: [] for d in detected_domains}
-    remainder = []
-
-    for cand in candidates:
-        types = cand.get("test_types", [])
-        placed = False
-        for domain in detected_domains:
-            if any(domain in t for t in types):
-                buckets[domain].append(cand)
-                placed = True
-                break
-        if not placed:
-            remainder.append(cand)
+        return list(range(min(n, len(rows))))
+
+    # Bucket candidates by their first matching detected domain (-1 = remainder).
+    # Assigning in reverse lets earlier domains overwrite later ones.
+    buckets = np.full(len(rows), -1, dtype=np.int32)
+    for d, domain in reversed(list(enumerate(detected_domains))):
+        buckets[meta.has_type(rows, domain)] = d
+
+    url_ids = meta.ids[rows]
 
     # Allocate slots per domain
     slots_per_domain = max(1, n // len(detected_domains))
     result = []
     seen_urls = set()
 
-    for domain in detected_domains:
+    for d in range(len(detected_domains)):
         count = 0
-        for item in buckets[domain]:
-            if item["url"] not in seen_urls and count < slots_per_domain:
-                result.append(item)
-                seen_urls.add(item["url"])
+        for pos in np.flatnonzero(buckets == d):
+            if count >= slots_per_domain:
+                break
+            code = url_ids[pos]
+            if code not in seen_urls:
+                result.append(int(pos))
+                seen_urls.add(code)
                 count += 1
 
     # Fill remaining slots from remainder or overflow, by score order
-    for item in candidates:
+    for pos, code in enumerate(url_ids):
         if len(result) >= n:
             break
-        if item["url"] not in seen_urls:
-            result.append(item)
-            seen_urls.add(item["url"])
+        if code not in seen_urls:
+            result.append(pos)
+            seen_urls.add(code)
 
     return result[:n]
 
 
+@dataclass
+class _SearchFilter:
+    """FAISS search parameters restricting the scan to rows that satisfy a constraint."""
+    params: faiss.SearchParameters
+    selector: faiss.IDSelector
+    bitmap: np.ndarray  # backs the selector; must outlive it
+    eligible: np.ndarray  # same rows as a boolean mask, for lexical search
+    count: int
+
+
+class ReloadInProgressError(RuntimeError):
+    """Raised by `SHLRecommender.reload()` when another reload or update is running."""
+
+
+@dataclass
+class IndexSnapshot:
+    """
+    Everything that changes when the catalog is rebuilt: vectors, metadata,
+    lexical index and the search filters derived from them. A request reads
+    `SHLRecommender.snapshot` once and uses it throughout, so swapping in a
+    new snapshot never mixes two index versions within one request.
+    """
+    index: faiss.Index
+    meta: MetadataStore  # base rows followed by delta rows
+    lexical: Optional[LexicalIndex]  # base rows only, until compaction
+    manifest: Optional[dict]
+    version: str
+    base_meta: Optional[MetadataStore] = None
+    delta: Optional[DeltaState] = None  # live upserts/removals (bundles only)
+    delta_log: Optional[DeltaLog] = None
+    live: Optional[np.ndarray] = None  # bool per row; None when nothing is removed
+    loaded_at: float = field(default_factory=time.time)
+    filters: TTLCache = field(
+        default_factory=lambda: TTLCache(max_size=SEARCH_FILTER_CACHE_SIZE, ttl_seconds=None)
+    )
+
+    @property
+    def has_delta_rows(self) -> bool:
+        return self.delta is not None and len(self.delta.records) > 0
+
+
+def _with_delta(snapshot: IndexSnapshot, delta: DeltaState) -> IndexSnapshot:
+    """The same base index with `delta` layered on top; `snapshot` is untouched."""
+    base_version = snapshot.manifest["version"] if snapshot.manifest else snapshot.version
+    return replace(
+        snapshot,
+        meta=snapshot.base_meta.append(delta.records) if delta.records else snapshot.base_meta,
+        version=f"{base_version}+{delta.seq}" if delta.seq else base_version,
+        delta=delta,
+        live=None if delta.all_live else delta.live,
+        loaded_at=time.time(),
+        filters=TTLCache(max_size=SEARCH_FILTER_CACHE_SIZE, ttl_seconds=None),
+    )
+
+
+def _load_snapshot(
+    faiss_path: Optional[Path],
+    meta_path: Optional[Path],
+    bundle_dir: Path,
+    hybrid: bool,
+) -> IndexSnapshot:
+    # Explicit loose-file paths win; otherwise the versioned bundle, then legacy files
+    if faiss_path is None and (bundle_dir / MANIFEST_NAME).exists():
+        # The bundle the link points at now; its delta log is read and appended there
+        bundle_dir = bundle_dir.resolve()
+        bundle = load_bundle(bundle_dir)
+        index, meta, manifest = bundle.index, bundle.meta, bundle.manifest
+        lexical = bundle.lexical if hybrid else None
+        version = bundle.version
+    else:
+        faiss_path, meta_path = faiss_path or FAISS_INDEX_PATH, meta_path or META_PATH
+        index, meta = load_index(faiss_path, meta_path)
+        manifest = None
+        lexical = load_lexical_index() if hybrid else None
+        version = index_version(faiss_path, meta_path)
+
+    # ANN search knobs: the bundle's own, unless overridden from the environment
+    search = INDEX_SEARCH_PARAMS
+    if not search and manifest is not None:
+        search = IndexSpec.parse(manifest.get("index_spec", "Flat")).search
+    set_search_params(index, search)
+
+    if lexical is not None and lexical.n_docs != len(meta):
+        logger.warning(
+            "Lexical index covers %d docs but metadata has %d; hybrid retrieval disabled.",
+            lexical.n_docs, len(meta)
+        )
+        lexical = None
+    snapshot = IndexSnapshot(
+        index=index, meta=meta, lexical=lexical, manifest=manifest, version=version, base_meta=meta,
+    )
+    if manifest is None:
+        return snapshot
+
+    # Replay live upserts/removals recorded since the bundle was built
+    delta_log = DeltaLog(bundle_dir / DELTA_DIRNAME, index.d)
+    ops = delta_log.read()
+    delta = DeltaState.empty(np.asarray(meta.ids), index.d)
+    if ops:
+        logger.info("Replaying %d delta ops over index bundle %s", len(ops), version)
+        delta = delta.apply(ops)
+    return replace(_with_delta(snapshot, delta), delta_log=delta_log)
+
+
 class SHLRecommender:
     
 
@@ -135,82 +260,428 @@ class SHLRecommender:
         faiss_path: Optional[Path] = None,
         meta_path: Optional[Path] = None,
         model_name: str = MODEL_NAME,
+        encoder_backend: str = DEFAULT_ENCODER_BACKEND,
+        embedding_cache: bool = True,
+        embedding_cache_size: int = EMBEDDING_CACHE_SIZE,
+        embedding_cache_ttl: Optional[float] = EMBEDDING_CACHE_TTL,
+        hybrid: bool = False,
+        bundle_dir: Path = BUNDLE_DIR,
     ):
         logger.info("Initializing SHLRecommender...")
-        self.index, self.meta = load_index(faiss_path, meta_path) if faiss_path else load_index()
-        logger.info("Loading embedding model: %s", model_name)
-        self.model = SentenceTransformer(model_name)
-        logger.info("SHLRecommender ready. Index size: %d", self.index.ntotal)
+        self._source = (faiss_path, meta_path, bundle_dir, hybrid)
+        snapshot = _load_snapshot(*self._source)
+        logger.info("Loading embedding model: %s (%s backend)", model_name, encoder_backend)
+        self.model_name = model_name
+        self.encoder = get_encoder(model_name, encoder_backend)
+        self._check_compatible(snapshot)
+        self.embedding_cache = TTLCache(
+            max_size=embedding_cache_size,
+            ttl_seconds=embedding_cache_ttl,
+            enabled=embedding_cache,
+        )
+        self.snapshot = snapshot
+        self._reload_lock = threading.Lock()
+        logger.info("SHLRecommender ready. Index size: %d", snapshot.index.ntotal)
+
+    # Current-snapshot views, for callers that don't care about reloads
+    @property
+    def index(self) -> faiss.Index:
+        return self.snapshot.index
+
+    @property
+    def meta(self) -> MetadataStore:
+        return self.snapshot.meta
+
+    @property
+    def lexical(self) -> Optional[LexicalIndex]:
+        return self.snapshot.lexical
+
+    @property
+    def manifest(self) -> Optional[dict]:
+        return self.snapshot.manifest
+
+    @property
+    def version(self) -> str:
+        return self.snapshot.version
+
+    def _check_compatible(self, snapshot: IndexSnapshot) -> None:
+        if snapshot.manifest is not None:
+            check_encoder_compatible(snapshot.manifest, self.model_name, self.encoder.dim)
+        elif snapshot.index.d != self.encoder.dim:
+            raise ValueError(
+                f"FAISS index has {snapshot.index.d}-dim vectors but the encoder produces "
+                f"{self.encoder.dim}-dim embeddings. Rebuild the index."
+            )
+
+    def reload(self, warmup_query: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Load the on-disk index again and swap it in, keeping the encoder and
+        query-embedding cache. Returns False if the version is unchanged.
+
+        The new snapshot is loaded, validated and optionally warmed up before
+        the swap; in-flight requests finish on the snapshot they started with.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("An index reload or update is already in progress.")
+        try:
+            previous = self.snapshot
+            snapshot = _load_snapshot(*self._source)
+            if snapshot.version == previous.version and not force:
+                logger.info("Index version %s unchanged; nothing to reload.", snapshot.version)
+                return False
+            self._check_compatible(snapshot)
+            if warmup_query:
+                self._recommend_many(snapshot, [(warmup_query, MAX_RESULTS)], MIN_RESULTS)
+
+            self.snapshot = snapshot
+            logger.info(
+                "Swapped index %s (%d vectors) -> %s (%d vectors)",
+                previous.version, previous.index.ntotal, snapshot.version, snapshot.index.ntotal,
+            )
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def apply_changes(
+        self,
+        upserts: list[dict] = (),
+        removals: list[str] = (),
+    ) -> str:
+        """
+        Add/replace assessments (by URL) and remove others (by URL) in the
+        live index. Only the upserted documents are encoded; the change is
+        appended to the bundle's delta log and swapped in as a new snapshot.
+        Returns the new index version.
+        """
+        records = [_metadata_record(a) for a in upserts]
+        if any(not r["url"] for r in records):
+            raise ValueError("Upserted assessments need a URL.")
+        vectors = (
+            self.encoder.encode([_build_document(r) for r in records], batch_size=64)
+            if records else []
+        )
+        ops = [DeltaOp(REMOVE, assessment_id(url)) for url in removals]
+        ops += [DeltaOp(UPSERT, assessment_id(r["url"]), r, v) for r, v in zip(records, vectors)]
+
+        with self._reload_lock:
+            snapshot = self.snapshot
+            if snapshot.delta_log is None:
+                raise ValueError(
+                    "Live updates need an index bundle. Rebuild with: python -m embeddings.index_builder"
+                )
+            try:
+                self.snapshot = self._append_changes(snapshot, ops, removals)
+            except DeltaLogSealed:
+                # Compacted since this snapshot was loaded: the new bundle's log
+                # carries everything appended here, so reload and append there
+                logger.info("Index bundle %s was compacted; reloading before applying changes", snapshot.version)
+                snapshot = _load_snapshot(*self._source)
+                self._check_compatible(snapshot)
+                self.snapshot = self._append_changes(snapshot, ops, removals)
+        logger.info(
+            "Applied %d upserts and %d removals; index version %s",
+            len(records), len(removals), self.snapshot.version
+        )
+        return self.snapshot.version
+
+    @staticmethod
+    def _append_changes(snapshot: IndexSnapshot, ops: list[DeltaOp], removals: list[str]) -> IndexSnapshot:
+        missing = [url for url in removals if snapshot.delta.row_of(assessment_id(url)) is None]
+        if missing:
+            raise KeyError(f"Not in the index: {', '.join(missing)}")
+        snapshot.delta_log.append(ops)
+        return _with_delta(snapshot, snapshot.delta.apply(ops))
+
+    def set_search_params(self, search: str) -> None:
+        """
+        Change ANN search knobs (e.g. "nprobe=32", "efSearch=128") on the live
+        index. Lasts until the next reload, which reapplies the bundle's knobs.
+        """
+        with self._reload_lock:
+            snapshot = self.snapshot
+            set_search_params(snapshot.index, search)
+            # Cached filters hold search parameters built with the old knobs
+            self.snapshot = replace(
+                snapshot, filters=TTLCache(max_size=SEARCH_FILTER_CACHE_SIZE, ttl_seconds=None)
+            )
+        logger.info("Index search parameters set to %s", search)
+
+    def upsert_assessment(self, assessment: dict) -> str:
+        return self.apply_changes(upserts=[assessment])
+
+    def remove_assessment(self, url: str) -> str:
+        return self.apply_changes(removals=[url])
+
+    def _embed(self, queries: list[str]) -> np.ndarray:
+        keys = [(self.encoder.name, canonicalize_query(q)) for q in queries]
+        vectors: list[Optional[np.ndarray]] = [self.embedding_cache.get(k) for k in keys]
+        hits = sum(v is not None for v in vectors)
+        EMBEDDING_LOOKUPS.inc("hit", amount=hits)
+        EMBEDDING_LOOKUPS.inc("miss", amount=len(vectors) - hits)
+
+        # Encode each distinct missing query once, in a single forward pass
+        missing: dict[tuple[str, str], str] = {}
+        for key, query, vec in zip(keys, queries, vectors):
+            if vec is None and key not in missing:
+                missing[key] = query
+
+        if missing:
+            encoded = self.encoder.encode(list(missing.values()))
+            fresh = dict(zip(missing, encoded))
+            for key, vec in fresh.items():
+                vec.setflags(write=False)
+                self.embedding_cache.put(key, vec)
+            vectors = [fresh[k] if v is None else v for k, v in zip(keys, vectors)]
+
+        return np.stack(vectors)
+
+    def _search_filter(
+        self,
+        snapshot: IndexSnapshot,
+        max_duration: Optional[int],
+        min_n: int,
+    ) -> Optional[_SearchFilter]:
+        
+        if max_duration is None and snapshot.live is None:
+            return None
+
+        # Removed rows are always excluded, with or without a duration limit
+        search_filter = snapshot.filters.get(max_duration)
+        if search_filter is None:
+            meta = snapshot.meta
+            eligible = meta.duration_ok(np.arange(len(meta)), max_duration)
+            if snapshot.live is not None:
+                eligible &= snapshot.live
+            bitmap = np.packbits(eligible, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            search_filter = _SearchFilter(
+                params=search_parameters(snapshot.index, selector),
+                selector=selector,
+                bitmap=bitmap,
+                eligible=eligible,
+                count=int(eligible.sum()),
+            )
+            snapshot.filters.put(max_duration, search_filter)
+
+        # Only apply filter if enough of the catalog satisfies it
+        if max_duration is not None and search_filter.count < min_n:
+            logger.warning(
+                "Duration filter (%d min) matches only %d assessments; relaxing filter.",
+                max_duration, search_filter.count
+            )
+            FILTER_RELAXATIONS.inc()
+            return self._search_filter(snapshot, None, min_n)
+        return search_filter
+
+    @staticmethod
+    def _pool_size(
+        snapshot: IndexSnapshot,
+        top_n: int,
+        search_filter: Optional[_SearchFilter] = None,
+    ) -> int:
+        available = search_filter.count if search_filter else len(snapshot.meta)
+        return min(top_n * RETRIEVAL_MULTIPLIER, available)
+
+    @staticmethod
+    def _dense_search(
+        snapshot: IndexSnapshot,
+        query_vecs: np.ndarray,
+        k: int,
+        search_filter: Optional[_SearchFilter],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        scores, indices = snapshot.index.search(
+            query_vecs, k,
+            params=search_filter.params if search_filter else None,
+        )
+        if not snapshot.has_delta_rows:
+            return scores, indices
+
+        # Upserted rows live outside the FAISS index until compaction: score
+        # them exactly (after the index's PCA projection, so scores are
+        # comparable) and merge with the base hits
+        delta = snapshot.delta
+        delta_rows = np.arange(delta.base_rows, delta.base_rows + len(delta.records))
+        eligible = search_filter.eligible[delta_rows] if search_filter else np.ones(len(delta_rows), bool)
+        delta_scores = (
+            to_search_space(snapshot.index, query_vecs)
+            @ to_search_space(snapshot.index, delta.vectors).T
+        )
+        delta_scores[:, ~eligible] = -np.inf
+        delta_indices = np.broadcast_to(np.where(eligible, delta_rows, -1), delta_scores.shape)
+
+        scores = np.concatenate([scores, delta_scores], axis=1)
+        indices = np.concatenate([indices, delta_indices], axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+    def _fuse_lexical(
+        self,
+        snapshot: IndexSnapshot,
+        queries: list[str],
+        top_ns: list[int],
+        filters: list[Optional[_SearchFilter]],
+        hits: list[tuple[np.ndarray, np.ndarray]],
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        pools = [self._pool_size(snapshot, n, f) for n, f in zip(top_ns, filters)]
+        lexical_hits = snapshot.lexical.search(
+            queries, max(pools), eligible=[f.eligible if f else None for f in filters]
+        )
+
+        fused = []
+        for (dense_scores, dense_rows), (lex_rows, _), pool in zip(hits, lexical_hits, pools):
+            # No query term in the vocabulary: the dense ranking stands as is
+            if len(lex_rows) == 0:
+                fused.append((dense_scores, dense_rows))
+                continue
+            rows, scores = reciprocal_rank_fusion(
+                [dense_rows[dense_rows >= 0], lex_rows[:pool]],
+                k=RRF_K,
+                weights=[1.0, LEXICAL_WEIGHT],
+            )
+            fused.append((scores[:pool], rows[:pool]))
+        return fused
+
+    def _rerank(
+        self,
+        meta: MetadataStore,
+        detected_domains: list[str],
+        scores: np.ndarray,
+        indices: np.ndarray,
+        top_n: int,
+        min_n: int,
+        timings: StageTimings,
+    ) -> list[dict]:
+        # 4. Candidate pool as index rows (FAISS pads short results with -1)
+        with timings.span("candidates"):
+            valid = (indices >= 0) & (indices < len(meta))
+            rows = indices[valid]
+            scores = scores[valid]
+        POOL_SIZE.observe(len(rows))
+
+        with timings.span("balance"):
+            # 5. Domain-balanced reranking
+            picked = _balance_by_domain(rows, meta, detected_domains, top_n)
+
+            # 6. Ensure minimum
+            if len(picked) < min_n:
+                # Top up from remaining candidates by score
+                url_ids = meta.ids[rows]
+                seen = {url_ids[p] for p in picked}
+                for pos, code in enumerate(url_ids):
+                    if code not in seen:
+                        picked.append(pos)
+                        seen.add(code)
+                    if len(picked) >= min_n:
+                        break
+
+        # Materialize only the rows that make it into the response
+        with timings.span("materialize"):
+            results = []
+            for pos in picked[:top_n]:
+                item = meta.record(rows[pos])
+                item["_score"] = float(scores[pos])
+                results.append(item)
+
+        logger.info("Returning %d recommendations for query.", len(results))
+        return results
 
     def recommend(
         self,
         query: str,
         top_n: int = MAX_RESULTS,
         min_n: int = MIN_RESULTS,
+        timings: Optional[StageTimings] = None,
     ) -> list[dict]:
         
-        if not query or not query.strip():
-            raise ValueError("Query cannot be empty.")
+        return self.recommend_many([(query, top_n)], min_n=min_n, timings=timings)[0]
 
-        top_n = max(min_n, min(top_n, MAX_RESULTS))
+    def recommend_many(
+        self,
+        requests: list[tuple[str, int]],
+        min_n: int = MIN_RESULTS,
+        timings: Optional[StageTimings] = None,
+    ) -> list[list[dict]]:
+        """
+        Serve several (query, top_n) requests with one encode and one search per
+        constraint. Stage durations are added to `timings`, if given.
+        """
+        return self._recommend_many(self.snapshot, requests, min_n, timings)
+
+    def _recommend_many(
+        self,
+        snapshot: IndexSnapshot,
+        requests: list[tuple[str, int]],
+        min_n: int,
+        timings: Optional[StageTimings] = None,
+    ) -> list[list[dict]]:
+        if not requests:
+            return []
+        for query, _ in requests:
+            if not query or not query.strip():
+                raise ValueError("Query cannot be empty.")
+
+        # Everything below sees the form the response and embedding caches are
+        # keyed by, so a cached result always equals a freshly computed one
+        queries = [canonicalize_query(q) for q, _ in requests]
+        top_ns = [max(min_n, min(n, MAX_RESULTS)) for _, n in requests]
+        call = StageTimings()
 
         # 1. Detect domains and duration constraint
-        detected_domains = _detect_domains(query)
-        max_duration = _extract_duration_constraint(query)
-
-        logger.info(
-            "Query domains: %s | Duration constraint: %s min",
-            detected_domains, max_duration
-        )
-
-        # 2. Embed query
-        query_vec = self.model.encode(
-            [query],
-            normalize_embeddings=True,
-            convert_to_numpy=True,
-        ).astype(np.float32)
-
-        # 3. FAISS search — retrieve large pool for reranking
-        pool_size = min(top_n * RETRIEVAL_MULTIPLIER, self.index.ntotal)
-        scores, indices = self.index.search(query_vec, pool_size)
-
-        # 4. Build candidate list
-        candidates = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < 0 or idx >= len(self.meta):
-                continue
-            item = dict(self.meta[idx])
-            item["_score"] = float(score)
-            candidates.append(item)
-
-        # 5. Apply duration filter if requested
-        if max_duration is not None:
-            filtered = [
-                c for c in candidates
-                if c.get("duration") is None or c["duration"] <= max_duration
-            ]
-            # Only apply filter if it doesn't remove too many results
-            if len(filtered) >= min_n:
-                candidates = filtered
-            else:
-                logger.warning(
-                    "Duration filter (%d min) left only %d candidates; relaxing filter.",
-                    max_duration, len(filtered)
-                )
-
-        # 6. Domain-balanced reranking
-        results = _balance_by_domain(candidates, detected_domains, top_n)
-
-        # 7. Ensure minimum
-        if len(results) < min_n:
-            # Top up from remaining candidates by score
-            seen = {r["url"] for r in results}
-            for c in candidates:
-                if c["url"] not in seen:
-                    results.append(c)
-                    seen.add(c["url"])
-                if len(results) >= min_n:
-                    break
-
-        logger.info("Returning %d recommendations for query.", len(results))
-        return results[:top_n]
+        with call.span("domains"):
+            domains = [_detect_domains(q) for q in queries]
+        with call.span("duration"):
+            durations = [_extract_duration_constraint(q) for q in queries]
+        for detected_domains, max_duration in zip(domains, durations):
+            logger.info(
+                "Query domains: %s | Duration constraint: %s min",
+                detected_domains, max_duration
+            )
+        with call.span("selector"):
+            filters = [self._search_filter(snapshot, d, min_n) for d in durations]
+
+        # 2. Embed all queries in one forward pass
+        with call.span("encode"):
+            query_vecs = self._embed(queries)
+
+        # 3. FAISS search restricted to eligible rows — one scan per distinct
+        # constraint. Each row is cut back to the pool size its own top_n would
+        # have used, so batching never changes a single query's result.
+        groups: dict[int, list[int]] = {}
+        for i, search_filter in enumerate(filters):
+            groups.setdefault(id(search_filter), []).append(i)
+
+        hits: list[tuple[np.ndarray, np.ndarray]] = [None] * len(queries)
+        with call.span("search"):
+            for members in groups.values():
+                search_filter = filters[members[0]]
+                k = max(self._pool_size(snapshot, top_ns[i], search_filter) for i in members)
+                scores, indices = self._dense_search(snapshot, query_vecs[members], k, search_filter)
+                for row, i in enumerate(members):
+                    pool = self._pool_size(snapshot, top_ns[i], search_filter)
+                    hits[i] = (scores[row, :pool], indices[row, :pool])
+
+        # 3b. Hybrid: fuse BM25 rankings over the same eligible rows
+        if snapshot.lexical is not None:
+            with call.span("lexical"):
+                hits = self._fuse_lexical(snapshot, queries, top_ns, filters, hits)
+
+        results = [
+            self._rerank(snapshot.meta, domains[i], hits[i][0], hits[i][1], top_ns[i], min_n, call)
+            for i in range(len(queries))
+        ]
+        call.observe()
+        RECOMMEND_QUERIES.inc(amount=len(queries))
+        BATCH_SIZE.observe(len(queries))
+        if timings is not None:
+            timings.update(call)
+        return results
+
+    def recommend_batch(
+        self,
+        queries: list[str],
+        top_n: int = MAX_RESULTS,
+        min_n: int = MIN_RESULTS,
+        timings: Optional[StageTimings] = None,
+    ) -> list[list[dict]]:
+        """Vectorized `recommend()` over many queries; row i matches recommend(queries[i])."""
+        return self.recommend_many([(q, top_n) for q in queries], min_n=min_n, timings=timings)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1024  # recent requests kept for wait/run time percentiles
+
+
+class QueueFullError(RuntimeError):
+    """The inference queue is at capacity; the request was not accepted."""
+
+
+class InferenceExecutor:
+    """
+    Dedicated thread pool for blocking inference calls, with a bounded queue.
+
+    At most `max_workers` calls run at once and at most `max_queue` more wait
+    for a thread. A call arriving beyond that raises QueueFullError right away,
+    so under a traffic spike callers shed load instead of queueing without
+    bound. Queue depth, rejections and queue wait / run times are tracked for
+    `stats()`.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "inference"):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.max_workers = max_workers
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # admitted and not yet finished: queued + running
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._run_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the pool and await its result."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(
+                    f"Inference queue is full ({self.max_queue} waiting, {self.max_workers} running)."
+                )
+            self._pending += 1
+            self.submitted += 1
+        enqueued = time.perf_counter()
+
+        def call() -> Any:
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self._wait_ms.append((started - enqueued) * 1000)
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run_ms.append((time.perf_counter() - started) * 1000)
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        future = self._pool.submit(call)
+        # Released when the call finishes (or is cancelled before it starts),
+        # not when the caller stops awaiting: a cancelled request's call keeps
+        # its thread, and counts against the bound, until it returns
+        future.add_done_callback(self._release)
+        # A cancelled request (client went away) drops its call if not started
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _percentiles(samples: list[float]) -> dict:
+        if not samples:
+            return {"p50": None, "p95": None, "p99": None, "max": None}
+        samples = sorted(samples)
+
+        def at(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+
+        return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": round(samples[-1], 3)}
+
+    def depth(self) -> tuple[int, int]:
+        """(running, queued) right now."""
+        with self._lock:
+            return self._running, self._pending - self._running
+
+    def stats(self) -> dict:
+        with self._lock:
+            wait_ms, run_ms = list(self._wait_ms), list(self._run_ms)
+            running, queued = self._running, self._pending - self._running
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self._percentiles(wait_ms),
+            "run_ms": self._percentiles(run_ms),
+        }
@@ -0,0 +1,220 @@
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# Record stage timings and counters; the /metrics endpoint is empty when off
+METRICS_ENABLED = os.getenv("SHL_METRICS", "1") != "0"
+
+# Seconds; recommend() stages range from microseconds (regexes) to ~100 ms (encode)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 40, 80, 160, 320, 640)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, optionally split by label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = labelnames
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Gauge:
+    """Value read from a callback at scrape time (queue depth, cache counters)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Optional[float]], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+
+    def samples(self) -> Iterator[str]:
+        value = self.read()
+        if value is not None:
+            yield f"{self.name} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add `metric`; registering a name again replaces the previous one."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        if not METRICS_ENABLED:
+            return ""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "shl_recommend_stage_seconds",
+    "Time spent in each stage of serving recommendations, per recommend() call (a coalesced batch is one call).",
+    labelnames=("stage",),
+))
+RECOMMEND_SECONDS = REGISTRY.register(Histogram(
+    "shl_recommend_seconds",
+    "Wall time of recommend() calls, all stages included.",
+))
+RECOMMEND_QUERIES = REGISTRY.register(Counter(
+    "shl_recommend_queries_total",
+    "Queries served by recommend(), counting each query of a batch.",
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "shl_recommend_batch_size",
+    "Queries per recommend() call.",
+    buckets=SIZE_BUCKETS,
+))
+POOL_SIZE = REGISTRY.register(Histogram(
+    "shl_candidate_pool_size",
+    "Candidates retrieved per query before reranking.",
+    buckets=SIZE_BUCKETS,
+))
+EMBEDDING_LOOKUPS = REGISTRY.register(Counter(
+    "shl_embedding_cache_lookups_total",
+    "Query-embedding cache lookups by result.",
+    labelnames=("result",),
+))
+FILTER_RELAXATIONS = REGISTRY.register(Counter(
+    "shl_duration_filter_relaxations_total",
+    "Duration filters dropped because too few assessments satisfied them.",
+))
+
+
+class StageTimings:
+    """
+    Per-call stage durations. `span(stage)` adds the time spent in its block
+    to that stage, so a stage entered once per query of a batch accumulates.
+    """
+
+    __slots__ = ("stages", "started")
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - start
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def update(self, other: "StageTimings") -> None:
+        for stage, seconds in other.stages.items():
+            self.add(stage, seconds)
+
+    def observe(self) -> None:
+        """Record every stage, and the total since creation, in the histograms."""
+        for stage, seconds in self.stages.items():
+            STAGE_SECONDS.observe(seconds, stage)
+        RECOMMEND_SECONDS.observe(time.perf_counter() - self.started)
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value (durations in ms)."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items())
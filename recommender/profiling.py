@@ -0,0 +1,83 @@
+import cProfile
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv("SHL_PROFILE_DIR", "data/profiles"))
+# Fraction of /recommend requests profiled without being asked to (0 disables)
+PROFILE_SAMPLE_RATE = float(os.getenv("SHL_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_FILES = int(os.getenv("SHL_PROFILE_MAX_FILES", "200"))  # oldest profiles are deleted beyond this
+
+# One profile at a time: on Python 3.12+ cProfile hooks the whole interpreter
+# (and concurrent requests' work shows up in the profile)
+_active = threading.Lock()
+_sequence = itertools.count()
+
+
+def sampled(rate: float = PROFILE_SAMPLE_RATE) -> bool:
+    return rate > 0 and random.random() < rate
+
+
+def profile_call(
+    fn: Callable[[], Any],
+    name: str,
+    meta: Optional[dict] = None,
+    profile_dir: Path = PROFILE_DIR,
+) -> tuple[Any, Optional[Path]]:
+    """
+    Run `fn()` under cProfile and write the stats to `profile_dir` as
+    `<name>-<time>-<pid>-<n>.prof` (open with pstats or snakeviz), with
+    `meta` and the wall time in a `.json` next to it. Returns the result and
+    the profile path; if another profile is running, `fn` runs unprofiled
+    and the path is None.
+    """
+    if not _active.acquire(blocking=False):
+        logger.info("Profiler busy; running %s unprofiled.", name)
+        return fn(), None
+    try:
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            result = profiler.runcall(fn)
+        finally:
+            elapsed = time.perf_counter() - started
+            path = _write(profiler, name, elapsed, meta or {}, profile_dir)
+    finally:
+        _active.release()
+    return result, path
+
+
+def _write(profiler: cProfile.Profile, name: str, seconds: float, meta: dict, profile_dir: Path) -> Path:
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}"
+    path = profile_dir / f"{stem}.prof"
+    profiler.dump_stats(path)
+    with open(profile_dir / f"{stem}.json", "w", encoding="utf-8") as f:
+        json.dump({**meta, "seconds": round(seconds, 6)}, f, indent=2)
+    logger.info("Profile of %s (%.1f ms) written to %s", name, seconds * 1000, path)
+    _prune(profile_dir)
+    return path
+
+
+def _prune(profile_dir: Path, keep: int = PROFILE_MAX_FILES) -> None:
+    profiles = sorted(profile_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[:max(0, len(profiles) - keep)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".json").unlink(missing_ok=True)
+
+
+def summarize(path: Path, limit: int = 25, sort: str = "cumulative") -> str:
+    """The top `limit` functions of a saved profile, as pstats prints them."""
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,221 @@
+import argparse
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = Path(__file__).parent.parent / "data" / "parsing_fixtures"
+BASE_URL = "https://www.shl.com"
+CATALOG_URL = BASE_URL + "/solutions/products/product-catalog/"
+
+
+def load_fixtures(fixtures_dir: Path) -> dict[str, list[str]]:
+    """
+    Saved pages grouped by parser kind: either one subdirectory per kind
+    (the committed `data/parsing_fixtures/`), or an HTTP cache directory
+    (`data/http_cache/`, filled by any crawl) where each page's kind is
+    recorded alongside its body.
+    """
+    fixtures: dict[str, list[str]] = defaultdict(list)
+    for kind_dir in sorted(p for p in fixtures_dir.iterdir() if p.is_dir()):
+        for page in sorted(kind_dir.glob("*.html")):
+            fixtures[kind_dir.name].append(page.read_text(encoding="utf-8"))
+    for meta_path in sorted(fixtures_dir.glob("*.json")):
+        body_path = meta_path.with_suffix(".html")
+        if not body_path.exists():
+            continue
+        with open(meta_path, "r", encoding="utf-8") as f:
+            kinds = json.load(f).get("parsed", {})
+        html = body_path.read_text(encoding="utf-8")
+        for kind in kinds:
+            fixtures[kind].append(html)
+    return fixtures
+
+
+def lxml_parsers() -> dict[str, Callable[[str], object]]:
+    from crawler import parsing
+
+    return {
+        "detail": parsing.parse_assessment_detail,
+        "listing": lambda html: parsing.parse_catalog_html(html, BASE_URL),
+        "paginated": lambda html: parsing.parse_paginated_links(html, BASE_URL),
+        "catalog_root": lambda html: parsing.find_individual_test_url(html, BASE_URL, CATALOG_URL),
+    }
+
+
+def bs4_parsers() -> dict[str, Callable[[str], object]]:
+    """The BeautifulSoup parsers the crawler used before crawler/parsing.py, as the baseline."""
+    from bs4 import BeautifulSoup
+
+    from crawler.parsing import empty_detail
+    from crawler.test_types import TEST_TYPE_MAP
+
+    def absolute(href: str) -> str:
+        return href if href.startswith("http") else BASE_URL + href
+
+    def badges(tag) -> list[str]:
+        spans = tag.find_all("span", class_=re.compile(r"product-catalogue.*type", re.I))
+        if not spans:
+            spans = tag.find_all("span", attrs={"class": lambda c: c and "type" in c.lower()})
+        letters = [b.get_text(strip=True) for b in spans if b.get_text(strip=True) in TEST_TYPE_MAP]
+        return [TEST_TYPE_MAP[l] for l in letters]
+
+    def detail(html: str) -> dict:
+        result = empty_detail()
+        soup = BeautifulSoup(html, "lxml")
+        for sel in [".product-hero__description", ".product-description", "[class*='description']", "article p", ".hero p"]:
+            el = soup.select_one(sel)
+            if el and len(el.get_text(strip=True)) > 30:
+                result["description"] = el.get_text(separator=" ", strip=True)
+                break
+        if not result["description"]:
+            for p in soup.find_all("p"):
+                text = p.get_text(strip=True)
+                if len(text) > 60:
+                    result["description"] = text
+                    break
+        full_text = soup.get_text(separator=" ")
+        duration = re.search(r"(\d+)\s*(?:minutes?|mins?)", full_text, re.IGNORECASE)
+        if duration:
+            result["duration"] = int(duration.group(1))
+        if re.search(r"remote\s+testing.*?yes", full_text, re.IGNORECASE):
+            result["remote_support"] = "Yes"
+        if re.search(r"adaptive.*?yes|yes.*?adaptive", full_text, re.IGNORECASE):
+            result["adaptive_support"] = "Yes"
+        types = list(dict.fromkeys(
+            TEST_TYPE_MAP[l] for l in re.findall(r"\b([ABCDEKPS])\b", full_text) if l in TEST_TYPE_MAP
+        ))
+        if types:
+            result["test_types"] = types
+        return result
+
+    def listing(html: str):
+        soup = BeautifulSoup(html, "lxml")
+        assessments = []
+        rows = soup.select("tr.js-product-row, .product-catalogue__row, [data-href*='product-catalog']")
+        if not rows:
+            for link in soup.select("a[href*='/product-catalog/view/']"):
+                name = link.get_text(strip=True)
+                if name:
+                    assessments.append({"name": name, "url": absolute(link.get("href", "")), "test_types_raw": []})
+        else:
+            for row in rows:
+                link = row.select_one("a[href*='/product-catalog/view/']")
+                if not link:
+                    continue
+                assessments.append({
+                    "name": link.get_text(strip=True),
+                    "url": absolute(link.get("href", "")),
+                    "test_types_raw": badges(row),
+                })
+        next_link = soup.select_one("a[rel='next'], .pagination__next a, a.next")
+        if not next_link:
+            next_link = soup.find("a", string=re.compile(r"next", re.I))
+        next_url = None
+        if next_link and next_link.get("href", ""):
+            next_url = absolute(next_link.get("href", ""))
+        return assessments, next_url
+
+    def paginated(html: str) -> list[dict]:
+        soup = BeautifulSoup(html, "lxml")
+        items = []
+        for link in soup.select("a[href*='/product-catalog/view/']"):
+            name = link.get_text(strip=True)
+            if name:
+                items.append({
+                    "name": name,
+                    "url": absolute(link.get("href", "")),
+                    "test_types_raw": badges(link.parent or link),
+                })
+        return items
+
+    def catalog_root(html: str) -> str:
+        soup = BeautifulSoup(html, "lxml")
+        for a in soup.find_all("a", href=True):
+            text = a.get_text(strip=True).lower()
+            if "individual" in text and "test" in text:
+                return absolute(a["href"])
+        for a in soup.find_all("a", href=True):
+            if "type=1" in a["href"] or "individual" in a["href"].lower():
+                return absolute(a["href"])
+        return CATALOG_URL + "?type=1"
+
+    return {"detail": detail, "listing": listing, "paginated": paginated, "catalog_root": catalog_root}
+
+
+def _best_of(parse: Callable[[str], object], pages: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        for html in pages:
+            parse(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crawler's lxml parsers against the BeautifulSoup ones (pages/second) on the same pages"
+    )
+    parser.add_argument(
+        "--fixtures",
+        default=str(FIXTURES_DIR),
+        help="Committed fixture pages (one subdirectory per kind) or an HTTP cache directory "
+             "(default: data/parsing_fixtures)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the fixtures; the best is reported")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(Path(args.fixtures))
+    if not fixtures:
+        raise SystemExit(f"No saved pages found in {args.fixtures}.")
+    parsers = {"bs4": bs4_parsers(), "lxml": lxml_parsers()}
+
+    results = {}
+    totals = defaultdict(float)
+    total_pages = 0
+    for kind, pages in sorted(fixtures.items()):
+        if kind not in parsers["lxml"]:
+            continue
+        row = {
+            "pages": len(pages),
+            "kb_per_page": round(sum(len(p) for p in pages) / len(pages) / 1024, 1),
+            # Pages where the two parsers disagree (detail pages are read from
+            # <main> only, so page chrome no longer leaks into the fields)
+            "differing_pages": sum(parsers["bs4"][kind](p) != parsers["lxml"][kind](p) for p in pages),
+        }
+        for name, by_kind in parsers.items():
+            seconds = _best_of(by_kind[kind], pages, args.repeat)
+            row[f"{name}_pages_per_sec"] = round(len(pages) / seconds, 1)
+            totals[name] += seconds
+        row["speedup"] = round(row["lxml_pages_per_sec"] / row["bs4_pages_per_sec"], 1)
+        results[kind] = row
+        total_pages += len(pages)
+    results["total"] = {
+        "pages": total_pages,
+        **{f"{name}_pages_per_sec": round(total_pages / totals[name], 1) for name in parsers},
+        "speedup": round(totals["bs4"] / totals["lxml"], 1),
+    }
+
+    print(f"\n{'kind':<14}{'pages':>7}{'KB/page':>9}{'bs4 p/s':>10}{'lxml p/s':>10}{'speedup':>9}{'differ':>8}")
+    for kind, r in results.items():
+        print(
+            f"{kind:<14}{r['pages']:>7}{r.get('kb_per_page', ''):>9}{r['bs4_pages_per_sec']:>10}"
+            f"{r['lxml_pages_per_sec']:>10}{r['speedup']:>8}x{r.get('differing_pages', ''):>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        logger.info("Results saved to %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import email.utils
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# Slack for timer and scheduling jitter when comparing request times
+TOLERANCE = 0.02  # seconds
+
+
+class _Server:
+    """
+    Local HTTP server that records when each request arrives. `/limited/<n>`
+    answers 429 with `retry_after()` as Retry-After the first time each
+    path is hit, then 200;
+    `/missing` is a 404; every other path is a 200.
+    """
+
+    def __init__(self, retry_after: Callable[[], str]):
+        self.arrivals: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    first = all(path != self.path for _, path in server.arrivals)
+                    server.arrivals.append((time.monotonic(), self.path))
+                if self.path.startswith("/limited/") and first:
+                    self._reply(429, {"Retry-After": retry_after()})
+                elif self.path == "/missing":
+                    self._reply(404)
+                else:
+                    self._reply(200)
+
+            def _reply(self, status: int, headers: Optional[dict] = None):
+                body = b"ok" if status == 200 else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def times(self, prefix: str = "/") -> list[float]:
+        with self._lock:
+            return [t for t, path in self.arrivals if path.startswith(prefix)]
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def check_spacing(rate: float, burst: int, n_requests: int, workers: int) -> list[str]:
+    """Concurrent requests to one host: a burst, then one request per 1/rate seconds."""
+    from crawler.fetch import Fetcher
+
+    server = _Server(retry_after=lambda: "1")
+    fetcher = Fetcher(rate_per_host=rate, burst=burst, max_connections=workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            statuses = list(pool.map(
+                lambda i: getattr(fetcher.get(f"{server.url}/page/{i}"), "status_code", None),
+                range(n_requests),
+            ))
+        times = sorted(server.times("/page/"))
+    finally:
+        fetcher.close()
+        server.close()
+
+    failures = []
+    if statuses != [200] * n_requests:
+        failures.append(f"spacing: expected {n_requests} × 200, got {statuses}")
+    # The k-th request after the burst can't arrive before k/rate seconds
+    for k, t in enumerate(times[burst:], start=1):
+        if t - times[0] < k / rate - TOLERANCE:
+            failures.append(
+                f"spacing: request {burst + k} arrived {t - times[0]:.3f}s after the first, "
+                f"before {k / rate:.3f}s allowed by {rate}/s with burst {burst}"
+            )
+            break
+    logger.info(
+        "Spacing: %d requests at %.1f/s (burst %d) over %.2fs; expected at least %.2fs",
+        len(times), rate, burst, times[-1] - times[0], (n_requests - burst) / rate,
+    )
+    return failures
+
+
+def check_retry_after(label: str, retry_after: Callable[[], str], expected_wait: float) -> list[str]:
+    """A 429 is retried no sooner than Retry-After, and the pause holds back the whole host."""
+    from crawler.fetch import Fetcher
+
+    server = _Server(retry_after=retry_after)
+    # A generous bucket, so any wait comes from Retry-After alone
+    fetcher = Fetcher(rate_per_host=100.0, burst=10, retries=3)
+    try:
+        resp = fetcher.get(f"{server.url}/limited/1")
+        # A second request to the same host shortly after the 429 must wait
+        # out the same pause
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(fetcher.get, f"{server.url}/limited/2")
+            time.sleep(0.1)
+            other = pool.submit(fetcher.get, f"{server.url}/page/after")
+            statuses = [f.result().status_code if f.result() is not None else None for f in (first, other)]
+        limited_1, limited_2 = server.times("/limited/1"), server.times("/limited/2")
+        page = server.times("/page/after")
+        missing = fetcher.get(f"{server.url}/missing")
+        missing_hits = len(server.times("/missing"))
+    finally:
+        fetcher.close()
+        server.close()
+
+    failures = []
+    if resp is None or resp.status_code != 200 or len(limited_1) != 2:
+        failures.append(f"Retry-After ({label}): expected 429 then 200, got {len(limited_1)} requests")
+    elif limited_1[1] - limited_1[0] < expected_wait - TOLERANCE:
+        failures.append(
+            f"Retry-After ({label}): retried after {limited_1[1] - limited_1[0]:.3f}s, "
+            f"expected at least {expected_wait:.1f}s"
+        )
+    if statuses != [200, 200]:
+        failures.append(f"Retry-After ({label}): concurrent requests returned {statuses}")
+    elif page[0] < limited_2[0] + expected_wait - TOLERANCE:
+        failures.append(
+            f"Retry-After ({label}): another request to the host went out "
+            f"{page[0] - limited_2[0]:.3f}s after the 429, inside the {expected_wait:.1f}s pause"
+        )
+    if missing is not None or missing_hits != 1:
+        failures.append(f"404: expected one request and no response, got {missing_hits} requests")
+    logger.info(
+        "Retry-After (%s): retried after %.2fs; other request held %.2fs",
+        label, limited_1[1] - limited_1[0] if len(limited_1) > 1 else float("nan"),
+        page[0] - limited_2[0] if page and limited_2 else float("nan"),
+    )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Check the crawler's Fetcher against a local HTTP server: per-host "
+            "token-bucket spacing, and 429 handling with Retry-After"
+        )
+    )
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second per host (default: 20)")
+    parser.add_argument("--burst", type=int, default=3, help="Token-bucket burst (default: 3)")
+    parser.add_argument("--requests", type=int, default=23, help="Requests in the spacing check (default: 23)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent callers (default: 4)")
+    args = parser.parse_args()
+
+    failures = check_spacing(args.rate, args.burst, args.requests, args.workers)
+    failures += check_retry_after("seconds", lambda: "1", expected_wait=1.0)
+    # HTTP-date form, 2 s ahead; dates have whole seconds, so the wait is in (1, 2]
+    failures += check_retry_after(
+        "HTTP date", lambda: email.utils.formatdate(time.time() + 2, usegmt=True), expected_wait=1.0
+    )
+
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        raise SystemExit(f"{len(failures)} fetch check(s) failed.")
+    print("\n Fetcher checks passed: request spacing, Retry-After (seconds and HTTP date), 404")
+
+
+if __name__ == "__main__":
+    main()
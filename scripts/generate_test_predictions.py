@@ -36,14 +36,22 @@ def generate_predictions(
     recommender = SHLRecommender()
 
     rows = []
-    for i, query in enumerate(queries):
-        logger.info("Processing test query %d/%d: '%s...'", i + 1, len(queries), query[:60])
-        try:
-            results = recommender.recommend(query, top_n=top_n)
-            for r in results:
-                rows.append({"Query": query, "Assessment_url": r["url"]})
-        except Exception as exc:
-            logger.error("Failed for query %d: %s", i + 1, exc)
+    logger.info("Processing %d test queries in one batch", len(queries))
+    try:
+        batch_results = recommender.recommend_batch(queries, top_n=top_n)
+    except Exception as exc:
+        # Retry one query at a time so a bad query only loses its own rows
+        logger.error("Batch recommendation failed (%s); retrying per query", exc)
+        batch_results = []
+        for i, query in enumerate(queries):
+            try:
+                batch_results.append(recommender.recommend(query, top_n=top_n))
+            except Exception as exc:
+                logger.error("Failed for query %d: %s", i + 1, exc)
+                batch_results.append([])
+    for query, results in zip(queries, batch_results):
+        for r in results:
+            rows.append({"Query": query, "Assessment_url": r["url"]})
 
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -6,6 +6,8 @@ import sys
 
 logging.basicConfig(level=logging.WARNING)
 
+WARMUP_QUERY = "Graduate analyst with Excel skills"
+
 
 def print_results(results: list[dict]) -> None:
     print(f"\n{'='*70}")
@@ -24,11 +26,45 @@ def print_results(results: list[dict]) -> None:
     print()
 
 
+def profile_query(recommender, query: str, top_n: int, profile_dir: str, sort: str) -> None:
+    """Profile one recommend() call plus response serialization and print the top functions."""
+    from pathlib import Path
+
+    from api.main import _to_response
+    from recommender.profiling import profile_call, summarize
+
+    # Pay one-off initialisation on another query, so the profile shows this
+    # query's own cost (cold embedding and filter caches included)
+    recommender.recommend(WARMUP_QUERY)
+    recommender.embedding_cache.clear()
+
+    def run():
+        results = recommender.recommend(query, top_n=top_n)
+        _to_response(results).model_dump_json()
+        return results
+
+    results, path = profile_call(
+        run, name="query_cli", meta={"query": query, "top_n": top_n}, profile_dir=Path(profile_dir)
+    )
+    print_results(results)
+    print(summarize(path, sort=sort))
+    print(f"Profile saved to {path}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Query SHL Recommender")
     parser.add_argument("--query", help="Query or JD text")
     parser.add_argument("--top_n", type=int, default=10)
     parser.add_argument("--url", help="Fetch JD from URL instead of --query")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="data/profiles",
+        default=None,
+        metavar="DIR",
+        help="Profile the query and save the .prof file to DIR (default: data/profiles)",
+    )
+    parser.add_argument("--profile_sort", default="cumulative", help="pstats sort key for the printed summary")
     args = parser.parse_args()
 
     from recommender.engine import SHLRecommender
@@ -56,6 +92,10 @@ def main():
             print_results(results)
         return
 
+    if args.profile:
+        profile_query(recommender, query, args.top_n, args.profile, args.profile_sort)
+        return
+
     results = recommender.recommend(query, top_n=args.top_n)
     print_results(results)
 
@@ -24,7 +24,12 @@ def main():
     parser.add_argument(
         "--skip_index",
         action="store_true",
-        help="Skip index building if data/faiss.index already exists",
+        help="Skip index building if data/index_bundle already exists",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Build the index while crawling, encoding assessments as their pages arrive",
     )
     parser.add_argument(
         "--skip_eval",
@@ -41,23 +46,36 @@ def main():
 
     
     assessments_path = Path("data/assessments.json")
+    # Streaming overlaps crawl and encoding, so it only applies when both run
+    streamed = args.stream and not (args.skip_crawl or args.skip_index)
 
-    if args.skip_crawl and assessments_path.exists():
+    if streamed:
+        logger.info("=" * 50)
+        logger.info("STEPS 1-2: Crawling and indexing (streaming)")
+        logger.info("=" * 50)
+        from crawler.journal import CrawlJournal
+        from crawler.shl_crawler import iter_crawl
+        from embeddings.index_builder import build_index_streaming
+        build_index_streaming(iter_crawl(skip_detail_pages=False))
+        count = CrawlJournal().compact(assessments_path)
+        logger.info("✅ Steps 1-2 complete: %d assessments crawled and indexed", count)
+    elif args.skip_crawl and assessments_path.exists():
         logger.info("Skipping crawl — using existing %s", assessments_path)
     else:
         logger.info("=" * 50)
         logger.info("STEP 1: Crawling SHL Product Catalog")
         logger.info("=" * 50)
-        from crawler.shl_crawler import crawl, save
-        assessments = crawl(skip_detail_pages=False)
-        save(assessments)
-        logger.info("✅ Step 1 complete: %d assessments saved", len(assessments))
+        from crawler.shl_crawler import crawl_to_file
+        count = crawl_to_file(assessments_path, skip_detail_pages=False)
+        logger.info("✅ Step 1 complete: %d assessments saved", count)
 
     
-    faiss_path = Path("data/faiss.index")
+    bundle_manifest = Path("data/index_bundle/manifest.json")
 
-    if args.skip_index and faiss_path.exists():
-        logger.info("Skipping index build — using existing %s", faiss_path)
+    if streamed:
+        pass  # built alongside the crawl above
+    elif args.skip_index and bundle_manifest.exists():
+        logger.info("Skipping index build — using existing %s", bundle_manifest.parent)
     else:
         logger.info("=" * 50)
         logger.info("STEP 2: Building FAISS Index")
@@ -87,7 +105,7 @@ def main():
 
     print("\n Full pipeline complete!")
     print("   Assessments:   data/assessments.json")
-    print("   FAISS index:   data/faiss.index")
+    print("   Index bundle:  data/index_bundle/")
     print("   Eval results:  data/eval_results.json")
     print("   Predictions:   data/predictions.csv")
     print("\nTo start the API:")
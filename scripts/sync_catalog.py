@@ -0,0 +1,68 @@
+
+
+import argparse
+import logging
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Sync the index with the live SHL catalog: only added or changed assessments "
+            "are encoded, and changes go to the index bundle's delta log. A running API "
+            "picks them up on POST /admin/reload or via SHL_INDEX_WATCH_INTERVAL."
+        )
+    )
+    parser.add_argument(
+        "--catalog",
+        help="Use this crawled assessments JSON instead of crawling now",
+    )
+    parser.add_argument(
+        "--skip_detail_pages",
+        action="store_true",
+        help="Crawl listing pages only",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold the delta log into a fresh index bundle afterwards",
+    )
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Report the diff without touching the index",
+    )
+    args = parser.parse_args()
+
+    from crawler.diff import diff_catalog
+    from crawler.shl_crawler import OUTPUT_PATH, crawl, load, save
+    from embeddings.index_builder import live_records
+
+    # Diff against what the index serves, including earlier synced changes
+    current = live_records()
+    fresh = load(Path(args.catalog)) if args.catalog else crawl(skip_detail_pages=args.skip_detail_pages)
+    diff = diff_catalog(current, fresh, listing_only=args.skip_detail_pages)
+    logger.info("Catalog diff: %s", diff.summary())
+
+    if args.dry_run or not diff:
+        return
+
+    from recommender.engine import SHLRecommender
+    recommender = SHLRecommender(embedding_cache=False, hybrid=False)
+    version = recommender.apply_changes(upserts=diff.upserts, removals=diff.removed_urls)
+    if not args.skip_detail_pages:
+        # A listing-only crawl would blank every description in the file
+        save(fresh, OUTPUT_PATH)
+    logger.info("Index updated to version %s", version)
+
+    if args.compact:
+        from embeddings.index_builder import compact_index
+        manifest = compact_index()
+        logger.info("Compacted into bundle %s (%d vectors)", manifest["version"], manifest["count"])
+
+
+if __name__ == "__main__":
+    main()